@@ -0,0 +1,37 @@
+import pandas as pd
+import pyarrow as pa
+
+from etl.config import dtype_backend
+from etl.transformer.convert import ConvertOperations
+
+
+def test_clean_numeric_with_nulls_and_junk():
+    # Textos sucios con nulos y valores que no se pueden convertir, en cada backend
+    for backend in (None, "numpy_nullable", "pyarrow"):
+        with dtype_backend(backend):
+            valores = ["$1,200", "abc", None, "-3.5"]
+            df = pd.DataFrame({"valor": valores, "texto": pd.Series(valores, dtype="string")})
+            if backend == "pyarrow":
+                # Como llega de read_csv con dtype_backend="pyarrow"
+                df["texto"] = df["texto"].astype(pd.ArrowDtype(pa.string()))
+            df = ConvertOperations.clean_numeric_columns(df, ["valor", "texto"])
+            for col in ("valor", "texto"):
+                assert df[col].iloc[0] == 1200 and df[col].iloc[3] == -3.5
+                assert df[col].isna().tolist() == [False, True, True, False]
+            print(f"✅ clean_numeric_columns ({backend}): {df['valor'].dtype}")
+
+
+def test_date_components_keep_arrow_types():
+    with dtype_backend("pyarrow"):
+        fechas = pd.to_datetime(pd.Series(["2024-03-05", None]))
+        df = pd.DataFrame({"fecha": fechas.astype("timestamp[us][pyarrow]")})
+        df = ConvertOperations.extract_date_components(df, "fecha")
+        assert str(df["fecha"].dtype) == "timestamp[us][pyarrow]", df["fecha"].dtype
+        assert str(df["fecha_year"].dtype) == "int64[pyarrow]", df["fecha_year"].dtype
+        assert df["fecha_month"].iloc[0] == 3 and pd.isna(df["fecha_day"].iloc[1])
+        print("✅ extract_date_components conserva los tipos de Arrow.")
+
+
+if __name__ == "__main__":
+    test_clean_numeric_with_nulls_and_junk()
+    test_date_components_keep_arrow_types()
@@ -8,6 +8,12 @@ todas_las_hojas = extractor.read_sheet()
 
 clientes_df = extractor.read_sheet(sheet_name="SEPTIEMBRE2")
 
+# Lectura por bloques con memoria constante (libros de cientos de miles de filas)
+total = 0
+for bloque in extractor.read_sheet(sheet_name="SEPTIEMBRE2", chunksize=50000):
+    total += len(bloque)
+print(f"Filas leídas por bloques: {total}")
+
 hojas = extractor.get_sheet_names()
 print(hojas)
 
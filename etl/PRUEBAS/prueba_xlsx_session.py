@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+import pandas as pd
+
+from etl.loaders.xlsx_loader import Excel_Loader
+
+
+def test_session_path_is_default():
+    # Ejemplo del docstring de Excel_Loader.session: las cargas sin 'path' van al libro de la sesión
+    carpeta = tempfile.mkdtemp()
+    mart = os.path.join(carpeta, "mart.xlsx")
+    for loader in (Excel_Loader(), Excel_Loader(os.path.join(carpeta, "otro.xlsx"))):
+        with loader.session(mart):
+            loader.load_dimension(pd.DataFrame({"id": [1, 2], "nombre": ["a", "b"]}), "dim")
+            loader.load_fact(pd.DataFrame({"id": [1], "valor": [10]}), "hechos")
+        hojas = pd.read_excel(mart, sheet_name=None)
+        assert list(hojas) == ["dim", "hechos"], list(hojas)
+        assert hojas["dim"]["nombre"].tolist() == ["a", "b"]
+    assert not os.path.exists(os.path.join(carpeta, "otro.xlsx"))
+    print("✅ La sesión usa su libro como ruta por defecto.")
+
+
+if __name__ == "__main__":
+    test_session_path_is_default()
@@ -0,0 +1,62 @@
+"""
+Paquete ETL: extractores, transformaciones y loaders.
+
+Las clases se cargan de forma diferida: 'import etl' no importa pandas, sqlalchemy ni
+openpyxl, y cada módulo se importa la primera vez que se usa uno de sus nombres
+(p. ej. etl.CSVExtractor). Así los scripts cortos y los procesos de un pool arrancan sin
+pagar el costo de importar todo el paquete. 'python -m etl' mide el tiempo de importación.
+"""
+from importlib import import_module
+
+# nombre público -> módulo que lo define
+_LAZY = {
+    # Extractores
+    "CSVExtractor": "etl.extractors.csv_extractor",
+    "XLSXExtractor": "etl.extractors.xlsx_extractor",
+    "DB_Extractor": "etl.extractors.db_extractor",
+    "ParallelCSVReader": "etl.extractors.parallel_csv",
+    "DtypePlan": "etl.extractors.dtype_planner",
+    "DtypePlanner": "etl.extractors.dtype_planner",
+    "WorkbookInspector": "etl.extractors.workbook_inspector",
+    "LazyTable": "etl.extractors.lazy_table",
+    # Loaders
+    "CSV_Loader": "etl.loaders.csv_loader",
+    "DB_Loader": "etl.loaders.db_loader",
+    "Excel_Loader": "etl.loaders.xlsx_loader",
+    "XLSXPackage": "etl.loaders.xlsx_package",
+    # Transformaciones
+    "BasicsTransformOperations": "etl.transformer.basics_data_transformer",
+    "TransformOperations": "etl.transformer.advanced_data_transforms",
+    "ConvertOperations": "etl.transformer.convert",
+    "DataExpresion": "etl.transformer.expresions",
+    "DataSelect": "etl.transformer.selecs",
+    "HeaderOperations": "etl.transformer.header",
+    "DateTime": "etl.transformer.fecha",
+    # Utilidades
+    "ColumnarCache": "etl.cache",
+    "StateStore": "etl.state",
+    "set_dtype_backend": "etl.config",
+    "get_dtype_backend": "etl.config",
+    "configure_pool": "etl.engines",
+    "dispose_engine": "etl.engines",
+    "get_engine": "etl.engines",
+    "concat_chunks": "etl.streaming",
+    "is_chunk_stream": "etl.streaming",
+    "reservoir_sample": "etl.streaming",
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module 'etl' has no attribute '{name}'")
+    value = getattr(import_module(module), name)
+    # Se guarda en el módulo para que los siguientes accesos no pasen por __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
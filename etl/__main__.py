@@ -0,0 +1,63 @@
+"""
+Mide el tiempo de importación del paquete: python -m etl [--budget-ms 50] [--repeat 3]
+
+Cada medición se hace en un intérprete nuevo, de modo que no influyen los módulos ya
+cargados. Primero se mide 'import etl' (que debe cumplir el presupuesto, ya que no importa
+dependencias pesadas) y luego el primer acceso a cada clase pública, que es cuando se
+importa su módulo. Termina con código 1 si 'import etl' supera el presupuesto.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+import etl
+
+
+# Presupuesto por defecto para 'import etl' en milisegundos
+IMPORT_BUDGET_MS = 50
+
+_SNIPPET = """
+import time
+start = time.perf_counter()
+import etl
+{access}
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def measure(name=None, repeat=3):
+    """Milisegundos (mínimo de 'repeat' corridas) de 'import etl' y, si se indica, de etl.<name>"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(etl.__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    code = _SNIPPET.format(access=f"etl.{name}" if name else "")
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            raise RuntimeError(f"Falló la importación de etl.{name or ''}: {result.stderr.strip()}")
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def benchmark(budget_ms=IMPORT_BUDGET_MS, repeat=3, names=None):
+    """Imprime los tiempos de importación; retorna True si 'import etl' cumple el presupuesto"""
+    base = measure(repeat=repeat)
+    ok = base <= budget_ms
+    print(f"{'import etl':<32}{base:>10.1f} ms   (presupuesto {budget_ms} ms: {'✅' if ok else '❌'})")
+    for name in names or etl.__all__:
+        try:
+            elapsed = measure(name, repeat=repeat)
+            print(f"{'etl.' + name:<32}{elapsed:>10.1f} ms")
+        except RuntimeError as e:
+            print(f"{'etl.' + name:<32}{'error':>10}      {str(e).splitlines()[-1]}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tiempo de importación del paquete etl")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("names", nargs="*", help="Nombres públicos a medir (por defecto, todos)")
+    args = parser.parse_args()
+    sys.exit(0 if benchmark(args.budget_ms, args.repeat, args.names) else 1)
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+
+import pandas as pd
+
+from etl.config import with_dtype_backend
+
+
+class ColumnarCache:
+    """
+    Caché en disco de DataFrames en formato columnar (Parquet o Arrow IPC/Feather).
+
+    Cada entrada es un archivo en 'cache_dir' cuyo nombre es el hash de la clave.
+    La fecha de modificación del archivo es el momento en que se guardó (para 'max_age') y
+    la fecha de acceso, que las lecturas actualizan, se usa como reloj LRU: cuando el
+    tamaño total supera 'max_bytes' se eliminan las entradas menos usadas.
+    """
+
+    FORMATS = {"parquet": ".parquet", "feather": ".arrow"}
+    # Hashes de contenido ya calculados, por ruta, tamaño y mtime de la fuente
+    HASHES_FILE = "content_hashes.json"
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3, file_format="parquet", hash_content=True):
+        """
+        Args:
+            cache_dir: Directorio donde se guardan las entradas (se crea si no existe)
+            max_bytes: Tamaño máximo total de la caché en bytes
+            file_format: "parquet" o "feather" (Arrow IPC)
+            hash_content: Si True, la clave de un archivo fuente incluye el hash de su contenido
+                          además de ruta, tamaño y fecha de modificación. El hash se guarda en
+                          'cache_dir' y solo se recalcula cuando cambian el tamaño o el mtime
+        """
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("ColumnarCache requiere pyarrow: pip install pyarrow") from e
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Formato de caché no soportado: {file_format}. Usa 'parquet' o 'feather'.")
+
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.file_format = file_format
+        self.hash_content = hash_content
+        self._hashes = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _file_hash(path, block_size=1024 * 1024):
+        """Hash del contenido del archivo leído por bloques"""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _content_hash(self, path, stat):
+        """
+        Hash del contenido de 'path', memorizado por (ruta, tamaño, mtime_ns) en un archivo
+        auxiliar de 'cache_dir': un acierto de caché no vuelve a leer la fuente completa.
+        """
+        if self._hashes is None:
+            try:
+                with open(os.path.join(self.cache_dir, self.HASHES_FILE), "r", encoding="utf-8") as f:
+                    self._hashes = json.load(f)
+            except (OSError, ValueError):
+                self._hashes = {}
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        known = self._hashes.get(path)
+        if known is not None and known[:2] == stamp:
+            return known[2]
+        content_hash = self._file_hash(path)
+        self._hashes[path] = stamp + [content_hash]
+        hashes_path = os.path.join(self.cache_dir, self.HASHES_FILE)
+        tmp_path = f"{hashes_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._hashes, f)
+            os.replace(tmp_path, hashes_path)
+        except OSError as e:
+            self._remove(tmp_path)
+            print(f"⚠️ No se pudo guardar el hash de contenido: {e}")
+        return content_hash
+
+    def source_fingerprint(self, path):
+        """
+        Identidad de un archivo fuente (ruta, tamaño, mtime y hash del contenido). Se puede
+        calcular una vez y pasar a source_key() para varias claves del mismo archivo.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        content_hash = self._content_hash(path, stat) if self.hash_content else None
+        return path, stat.st_size, stat.st_mtime_ns, content_hash
+
+    @staticmethod
+    def make_key(*parts):
+        """Construye una clave estable a partir de valores serializables (o de su repr)"""
+        payload = json.dumps(parts, sort_keys=True, default=repr)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+    def source_key(self, path, read_kwargs=None, fingerprint=None):
+        """
+        Clave para un archivo fuente: ruta, tamaño, mtime, hash del contenido y
+        argumentos de lectura. Cualquier cambio en el archivo produce una clave distinta.
+        'fingerprint' es el resultado de source_fingerprint(path) si ya se calculó.
+        """
+        fingerprint = fingerprint or self.source_fingerprint(path)
+        return self.make_key(*fingerprint, read_kwargs or {})
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + self.FORMATS[self.file_format])
+
+    def get(self, key, max_age=None):
+        """
+        Retorna el DataFrame guardado con 'key' o None si no existe.
+        Con 'max_age' (segundos), las entradas guardadas hace más tiempo se descartan.
+        """
+        path = self._entry_path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if max_age is not None and time.time() - stat.st_mtime > max_age:
+            self._remove(path)
+            return None
+        try:
+            if self.file_format == "parquet":
+                df = pd.read_parquet(path, **with_dtype_backend({}))
+            else:
+                df = pd.read_feather(path, **with_dtype_backend({}))
+        except Exception as e:
+            print(f"⚠️ Entrada de caché ilegible, se descarta: {e}")
+            self._remove(path)
+            return None
+        # Solo se actualiza el acceso: la modificación sigue marcando cuándo se guardó
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+        return df
+
+    def put(self, key, df):
+        """
+        Guarda el DataFrame con 'key'. Si el DataFrame no se puede representar en
+        formato columnar (p. ej. columnas con tipos mezclados) no se guarda.
+        """
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            if self.file_format == "parquet":
+                df.to_parquet(tmp_path)
+            else:
+                df.to_feather(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self._remove(tmp_path)
+            print(f"⚠️ No se pudo guardar en caché: {e}")
+            return False
+        self._evict()
+        return True
+
+    def invalidate(self, key):
+        """Elimina la entrada con 'key' si existe"""
+        self._remove(self._entry_path(key))
+
+    def clear(self):
+        """Elimina todas las entradas de la caché"""
+        for path, _, _ in self._entries():
+            self._remove(path)
+
+    def _entries(self):
+        """Lista de (ruta, tamaño, último uso) de las entradas de la caché"""
+        entries = []
+        suffix = self.FORMATS[self.file_format]
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(suffix):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_atime_ns))
+        return entries
+
+    def _evict(self):
+        """Elimina las entradas menos usadas hasta respetar max_bytes"""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
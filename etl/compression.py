@@ -0,0 +1,103 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import zipfile
+
+
+# Extensiones reconocidas y nombre del códec según el parámetro 'compression' de pandas
+EXTENSIONS = {
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+    ".zip": "zip",
+}
+
+# Firmas (magic bytes) al inicio de cada formato
+MAGIC_BYTES = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"PK\x03\x04", "zip"),
+]
+
+# Formatos en los que añadir un nuevo miembro/frame al final sigue siendo un archivo válido
+APPENDABLE = {"gzip", "bz2", "xz", "zstd"}
+
+
+def codec_from_extension(path):
+    """Códec según la extensión del archivo (None si no está comprimido)"""
+    return EXTENSIONS.get(os.path.splitext(str(path))[1].lower())
+
+
+def detect_codec(path):
+    """
+    Detecta el códec de un archivo. Si el archivo existe se usan sus primeros bytes, de modo
+    que se reconocen archivos comprimidos sin extensión; si no, se usa la extensión.
+    """
+    if os.path.isfile(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            head = f.read(8)
+        for magic, codec in MAGIC_BYTES:
+            if head.startswith(magic):
+                return codec
+        return None
+    return codec_from_extension(path)
+
+
+def strip_codec_extension(name):
+    """Quita la extensión de compresión: 'datos.csv.gz' -> 'datos.csv'"""
+    root, ext = os.path.splitext(name)
+    return root if ext.lower() in EXTENSIONS else name
+
+
+def with_compression(path, read_kwargs, codec=None):
+    """
+    Agrega 'compression' a los argumentos de pandas según el códec detectado, salvo que el
+    usuario ya lo haya indicado. pandas descomprime en streaming, también con 'chunksize'.
+    """
+    kwargs = dict(read_kwargs)
+    if "compression" not in kwargs:
+        codec = codec or detect_codec(path)
+        if codec:
+            kwargs["compression"] = codec
+    return kwargs
+
+
+def open_stream(path, codec=None):
+    """
+    Abre un archivo para lectura binaria descomprimiendo en streaming (sin archivos temporales).
+    """
+    codec = codec or detect_codec(path)
+    if codec is None:
+        return open(path, "rb")
+    if codec == "gzip":
+        return gzip.open(path, "rb")
+    if codec == "bz2":
+        return bz2.open(path, "rb")
+    if codec == "xz":
+        return lzma.open(path, "rb")
+    if codec == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("Los archivos .zst requieren zstandard: pip install zstandard") from e
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+    if codec == "zip":
+        archive = zipfile.ZipFile(path)
+        names = archive.namelist()
+        if len(names) != 1:
+            archive.close()
+            raise ValueError(f"El archivo zip debe contener un único archivo: {path}")
+        return archive.open(names[0])
+    raise ValueError(f"Códec de compresión no soportado: {codec}")
+
+
+def open_text(path, codec=None, encoding="utf-8"):
+    """Versión en texto de open_stream (sin traducir saltos de línea, como requiere csv)"""
+    return io.TextIOWrapper(open_stream(path, codec), encoding=encoding, newline="")
@@ -0,0 +1,111 @@
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+DTYPE_BACKENDS = (None, "numpy_nullable", "pyarrow")
+
+# Tipos equivalentes en cada backend para las conversiones de etl/transformer. Con Arrow se
+# usan tipos ArrowDtype (no los alias "...[pyarrow]"): "string[pyarrow]" es el StringDtype
+# de pandas y no coincide con el tipo que devuelven read_parquet o read_csv con pyarrow
+_BACKEND_DTYPES = {
+    None: {"int": "int", "float": "float", "str": str},
+    "numpy_nullable": {"int": "Int64", "float": "Float64", "str": "string"},
+}
+if pa is not None:
+    _BACKEND_DTYPES["pyarrow"] = {"int": pd.ArrowDtype(pa.int64()), "float": pd.ArrowDtype(pa.float64()),
+                                  "str": pd.ArrowDtype(pa.string())}
+
+_settings = {"dtype_backend": os.environ.get("ETL_DTYPE_BACKEND") or None}
+
+
+def _check_backend(backend):
+    if backend not in DTYPE_BACKENDS:
+        raise ValueError(f"dtype_backend no soportado: {backend}. Usa None, 'numpy_nullable' o 'pyarrow'.")
+    if backend == "pyarrow" and pa is None:
+        raise ImportError("El dtype_backend 'pyarrow' requiere pyarrow: pip install pyarrow")
+    return backend
+
+
+def set_dtype_backend(backend):
+    """
+    Define el backend de tipos de todos los extractores del paquete (CSV, Excel, base de
+    datos y caché columnar):
+
+    - None: tipos de NumPy de siempre (textos como object, enteros con nulos como float)
+    - "numpy_nullable": tipos con nulos de pandas (Int64, Float64, boolean, string)
+    - "pyarrow": columnas respaldadas por Arrow (string[pyarrow], int64[pyarrow],
+      timestamp[pyarrow]...), que ocupan mucha menos memoria en tablas con muchos textos
+
+    Las transformaciones de etl/transformer conservan estos tipos en lugar de convertir a
+    object. También se puede fijar con la variable de entorno ETL_DTYPE_BACKEND.
+    """
+    _settings["dtype_backend"] = _check_backend(backend)
+
+
+def get_dtype_backend():
+    """Backend de tipos configurado (None si se usan los tipos de NumPy)"""
+    return _check_backend(_settings["dtype_backend"])
+
+
+@contextmanager
+def dtype_backend(backend):
+    """Usa 'backend' solo dentro del bloque with"""
+    previous = _settings["dtype_backend"]
+    set_dtype_backend(backend)
+    try:
+        yield
+    finally:
+        _settings["dtype_backend"] = previous
+
+
+def with_dtype_backend(kwargs):
+    """
+    Agrega dtype_backend a los argumentos de lectura de pandas (read_csv, read_excel,
+    read_sql_*, read_parquet...) si hay uno configurado y no se indicó otro explícitamente.
+    Se resuelve al llamar, así los procesos de un pool reciben el valor en sus argumentos.
+    """
+    backend = get_dtype_backend()
+    if backend is None or "dtype_backend" in kwargs:
+        return kwargs
+    return {**kwargs, "dtype_backend": backend}
+
+
+def backend_dtype(kind):
+    """Tipo equivalente a 'int', 'float' o 'str' en el backend configurado"""
+    return _BACKEND_DTYPES[get_dtype_backend()][kind]
+
+
+def arrow_dates(df, backend):
+    """
+    Con el backend "pyarrow", las columnas de fecha que pandas entrega como datetime64 de
+    NumPy (parse_dates de read_csv y read_sql_*) se convierten a timestamp de Arrow con la
+    misma unidad y zona horaria: es el tipo que devuelve la caché columnar, así un resultado
+    tiene los mismos tipos se lea de la fuente o de la caché. Con otro backend no cambia nada.
+    """
+    if backend != "pyarrow" or df is None:
+        return df
+    dtypes = {}
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            dtypes[col] = pd.ArrowDtype(pa.timestamp(dtype.unit, tz=str(dtype.tz)))
+        elif dtype.kind == "M":
+            dtypes[col] = pd.ArrowDtype(pa.timestamp(np.datetime_data(dtype)[0]))
+    return df.astype(dtypes) if dtypes else df
+
+
+def as_text(series):
+    """
+    La serie como texto para usar .str: si ya es de texto (string o string[pyarrow]) se
+    devuelve tal cual; si no, se convierte al tipo de texto del backend configurado.
+    """
+    if series.dtype != object and str(series.dtype).startswith(("string", "str")):
+        return series
+    return series.astype(backend_dtype("str"))
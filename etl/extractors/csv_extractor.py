@@ -1,40 +1,259 @@
+import csv
+import hashlib
+import io
+import mmap
 import os
 import pandas as pd
-import petl as etl
 from tabulate import tabulate
+from etl.streaming import is_chunk_stream, reservoir_sample
+from etl.extractors.dtype_planner import DtypePlan
+from etl.extractors.parallel_csv import (ByteRangeReader, ParallelCSVReader, UNSUPPORTED_KWARGS,
+                                         last_record_end, record_end)
+from etl.compression import APPENDABLE, detect_codec, open_text, with_compression
+from etl.config import arrow_dates, with_dtype_backend
+from etl.state import StateStore
 
 class CSVExtractor:
-    def __init__(self, file_path):
+    def __init__(self, file_path, cache=None):
+        """
+        Args:
+            file_path: Ruta del archivo CSV
+            cache: ColumnarCache opcional; las lecturas completas se guardan en ella y
+                   las siguientes lecturas del mismo archivo sin cambios salen de la caché
+        Los archivos comprimidos (.gz, .bz2, .xz, .zst, .zip) se detectan por extensión o por
+        sus primeros bytes y se descomprimen en streaming al leer.
+        """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"El archivo {file_path} no existe.")
         self.file_path = file_path
+        self.cache = cache
+        self.compression = detect_codec(file_path)
+        self.last_incremental = None
     
-    def read_csv(self, **kwargs):
+    def read_csv(self, chunksize=None, dtype_plan=None, engine=None, workers=None, **kwargs):
         """
         Lee un archivo CSV y devuelve un DataFrame de pandas.
         
         Args:
+            chunksize: Si se indica, devuelve un iterador de DataFrames de como máximo
+                       'chunksize' filas en lugar de cargar todo el archivo en memoria.
+                       Las operaciones de etl/transformer y los loaders aceptan este iterador.
+            dtype_plan: DtypePlan (o ruta a un plan guardado) con los tipos a aplicar durante
+                        la lectura (categorías, enteros pequeños, fechas)
+            engine: "parallel" para parsear el archivo en varios procesos por rangos de bytes
+                    (ParallelCSVReader); cualquier otro valor se pasa a pd.read_csv(). En modo
+                    paralelo con 'chunksize' los bloques tienen 'chunksize' bytes aproximados
+            workers: Número de procesos del modo paralelo (por defecto, núcleos disponibles)
             **kwargs: Argumentos adicionales para pd.read_csv()
         """
+        dtype_plan = DtypePlan.resolve(dtype_plan)
+        if dtype_plan is not None and dtype_plan.downcasts:
+            # Los enteros pequeños del plan se leen como Int64 y se reducen tras comprobar su rango
+            return dtype_plan.downcast(self.read_csv(chunksize, engine=engine, workers=workers,
+                                                    **dtype_plan.apply(kwargs)))
         try:
-            data = pd.read_csv(self.file_path, **kwargs)
+            dtype_plan = DtypePlan.resolve(dtype_plan)
+            if dtype_plan is not None:
+                kwargs = dtype_plan.apply(kwargs)
+            kwargs = with_dtype_backend(with_compression(self.file_path, kwargs, self.compression))
+            if engine == "parallel":
+                if not kwargs.get("compression"):
+                    return self._read_parallel(chunksize, workers, **kwargs)
+                print("Archivo comprimido: no admite lectura por rangos de bytes, se lee de forma secuencial.")
+                engine = None
+            if engine is not None:
+                kwargs["engine"] = engine
+            if chunksize:
+                print(f"Leyendo archivo CSV por bloques de {chunksize} filas: {self.file_path}")
+                return self._iter_chunks(chunksize, **kwargs)
+            if self.cache is not None:
+                key = self.cache.source_key(self.file_path, kwargs)
+                data = self.cache.get(key)
+                if data is not None:
+                    print(f"Archivo CSV leído desde caché: {self.file_path}")
+                    return data
+            data = arrow_dates(pd.read_csv(self.file_path, **kwargs), kwargs.get("dtype_backend"))
+            if self.cache is not None:
+                self.cache.put(key, data)
             print(f"Archivo CSV leído exitosamente: {self.file_path}")
             return data
         except Exception as e:
             print(f"Error al leer el archivo CSV: {e}")
             raise
+
+    def _read_parallel(self, chunksize, workers, **kwargs):
+        """Lectura con ParallelCSVReader (completa o por bloques de bytes)"""
+        if chunksize:
+            reader = ParallelCSVReader(self.file_path, workers=workers, chunk_bytes=chunksize)
+            print(f"Leyendo archivo CSV en paralelo por bloques: {self.file_path}")
+            return (arrow_dates(chunk, kwargs.get("dtype_backend")) for chunk in reader.iter_chunks(**kwargs))
+        if self.cache is not None:
+            key = self.cache.source_key(self.file_path, kwargs)
+            data = self.cache.get(key)
+            if data is not None:
+                print(f"Archivo CSV leído desde caché: {self.file_path}")
+                return data
+        data = arrow_dates(ParallelCSVReader(self.file_path, workers=workers).read(**kwargs),
+                           kwargs.get("dtype_backend"))
+        if self.cache is not None:
+            self.cache.put(key, data)
+        print(f"Archivo CSV leído exitosamente en paralelo: {self.file_path}")
+        return data
+
+    def _iter_chunks(self, chunksize, **kwargs):
+        """Generador que entrega el CSV por bloques y cierra el archivo al terminar."""
+        with pd.read_csv(self.file_path, chunksize=chunksize, **kwargs) as reader:
+            for chunk in reader:
+                yield arrow_dates(chunk, kwargs.get("dtype_backend"))
     
-    def preview_data(self, n=5, **kwargs):
+    def read_incremental(self, state, key=None, chunksize=None, dtype_plan=None, tail_bytes=4096, **kwargs):
+        """
+        Lee solo las filas agregadas al CSV desde la ejecución anterior.
+
+        El checkpoint guardado en 'state' contiene el offset en bytes del último registro leído,
+        el número de filas, la huella del encabezado, la identidad del archivo (dispositivo e
+        inodo) y un hash de los últimos bytes leídos. En la siguiente ejecución se lee desde
+        ese offset hasta el último registro completo (una línea a medio escribir queda para la
+        próxima ejecución). Si el archivo fue truncado, rotado, reemplazado o cambió su
+        encabezado, se hace una lectura completa y se reinicia el checkpoint.
+
+        Args:
+            state: StateStore (o ruta de su archivo JSON) donde se guarda el checkpoint
+            key: Clave del checkpoint (por defecto, la ruta absoluta del archivo)
+            chunksize: Si se indica, devuelve un iterador de DataFrames; el checkpoint se
+                       guarda cuando el iterador se consume por completo
+            dtype_plan: DtypePlan (o ruta a un plan guardado) aplicado durante la lectura
+            tail_bytes: Bytes previos al offset usados para detectar que el archivo fue reescrito
+            **kwargs: Argumentos adicionales para pd.read_csv()
+        Returns:
+            DataFrame con las filas nuevas (o iterador de DataFrames si se usa chunksize).
+            El índice continúa la numeración de filas del archivo. self.last_incremental
+            indica si la lectura fue incremental o completa y por qué.
+        """
+        dtype_plan = DtypePlan.resolve(dtype_plan)
+        if dtype_plan is not None and dtype_plan.downcasts:
+            # Los enteros pequeños del plan se leen como Int64 y se reducen tras comprobar su rango
+            return dtype_plan.downcast(self.read_incremental(state, key=key, chunksize=chunksize, tail_bytes=tail_bytes,
+                                                            **dtype_plan.apply(kwargs)))
+        try:
+            unsupported = [k for k in UNSUPPORTED_KWARGS if k in kwargs]
+            if unsupported:
+                raise ValueError(f"Argumentos no soportados en lectura incremental: {unsupported}")
+            dtype_plan = DtypePlan.resolve(dtype_plan)
+            if dtype_plan is not None:
+                kwargs = dtype_plan.apply(kwargs)
+            kwargs = with_dtype_backend(kwargs)
+            state = StateStore.resolve(state)
+            key = key or os.path.abspath(self.file_path)
+
+            if self.compression:
+                # Los offsets de un archivo comprimido no corresponden a registros del CSV
+                print(f"Archivo comprimido: no admite checkpoints por offset, se lee completo: {self.file_path}")
+                self.last_incremental = {"mode": "full", "reason": "compressed", "rows": None}
+                return self.read_csv(chunksize=chunksize, **kwargs)
+
+            quote = kwargs.get("quotechar", '"').encode()
+            stat = os.stat(self.file_path)
+            file_id = [stat.st_dev, stat.st_ino]
+            if stat.st_size == 0:
+                raise ValueError(f"El archivo {self.file_path} está vacío.")
+
+            with open(self.file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data_start = record_end(mm, 0, 0, quote)
+                header_hash = hashlib.blake2b(mm[:data_start], digest_size=16).hexdigest()
+                checkpoint = state.get(key)
+                reason = self._checkpoint_mismatch(mm, checkpoint, file_id, header_hash, tail_bytes)
+                start = data_start if reason else checkpoint["offset"]
+                end = last_record_end(mm, start, quote)
+                new_tail = self._tail_hash(mm, end, tail_bytes) if end > data_start else None
+
+            if reason:
+                print(f"Lectura completa ({reason}): {self.file_path}")
+                previous_rows = 0
+            else:
+                print(f"Lectura incremental desde el byte {start} ({end - start} bytes nuevos): {self.file_path}")
+                previous_rows = checkpoint["rows"]
+            self.last_incremental = {"mode": "full" if reason else "incremental", "reason": reason,
+                                     "start": start, "end": end, "rows": None}
+
+            columns = list(pd.read_csv(self.file_path, nrows=0, **{
+                k: v for k, v in kwargs.items() if k in ("sep", "delimiter", "quotechar", "encoding")
+            }).columns)
+
+            def save(rows):
+                self.last_incremental["rows"] = rows
+                state.set(key, {"offset": end, "rows": previous_rows + rows, "header": header_hash,
+                                "file_id": file_id, "tail": new_tail})
+                print(f"💾 Checkpoint guardado: byte {end}, {previous_rows + rows} filas ({rows} nuevas)")
+
+            def read(**read_kwargs):
+                return pd.read_csv(io.BufferedReader(ByteRangeReader(self.file_path, start, end)),
+                                   header=None, names=columns, **read_kwargs)
+
+            if chunksize:
+                return self._iter_incremental(read if end > start else None, chunksize, previous_rows, save, kwargs)
+
+            data = arrow_dates(read(**kwargs), kwargs.get("dtype_backend")) if end > start else pd.DataFrame(columns=columns)
+            data.index = pd.RangeIndex(previous_rows, previous_rows + len(data))
+            save(len(data))
+            return data
+        except Exception as e:
+            print(f"Error en la lectura incremental del CSV: {e}")
+            raise
+
+    @staticmethod
+    def _iter_incremental(read, chunksize, previous_rows, save, kwargs):
+        """Generador de bloques de la lectura incremental; guarda el checkpoint al terminar"""
+        rows = 0
+        if read is not None:
+            with read(chunksize=chunksize, **kwargs) as reader:
+                for chunk in reader:
+                    chunk.index = pd.RangeIndex(previous_rows + rows, previous_rows + rows + len(chunk))
+                    rows += len(chunk)
+                    yield arrow_dates(chunk, kwargs.get("dtype_backend"))
+        save(rows)
+
+    @staticmethod
+    def _tail_hash(mm, end, tail_bytes):
+        return hashlib.blake2b(mm[max(end - tail_bytes, 0):end], digest_size=16).hexdigest()
+
+    def _checkpoint_mismatch(self, mm, checkpoint, file_id, header_hash, tail_bytes):
+        """Motivo por el que el checkpoint no sirve (None si se puede continuar desde él)"""
+        if not checkpoint:
+            return "sin checkpoint"
+        if checkpoint.get("file_id") != file_id:
+            return "archivo rotado"
+        if checkpoint.get("header") != header_hash:
+            return "encabezado distinto"
+        offset = checkpoint.get("offset", 0)
+        if len(mm) < offset:
+            return "archivo truncado"
+        if checkpoint.get("tail") and self._tail_hash(mm, offset, tail_bytes) != checkpoint["tail"]:
+            return "contenido reescrito"
+        return None
+
+    def preview_data(self, n=5, sample=False, random_state=None, chunksize=100000, **kwargs):
         """
         Muestra una vista previa de los datos del CSV.
+        Solo se leen las filas que se muestran: sin 'sample' se parsean las primeras n filas;
+        con 'sample' se recorre el archivo por bloques y se toma una muestra aleatoria de n
+        filas (reservoir sampling) manteniendo solo n filas en memoria.
         
         Args:
             n: Número de filas a mostrar
+            sample: Si True, muestra n filas aleatorias en lugar de las primeras
+            random_state: Semilla para la muestra aleatoria
+            chunksize: Tamaño de bloque usado al recorrer el archivo en modo sample
             **kwargs: Argumentos adicionales para pd.read_csv()
         """
         try:
-            data = self.read_csv(**kwargs)
+            kwargs = with_dtype_backend(with_compression(self.file_path, kwargs, self.compression))
+            if sample:
+                data = reservoir_sample(self._iter_chunks(chunksize, **kwargs), n, random_state)
+            else:
+                data = arrow_dates(pd.read_csv(self.file_path, nrows=n, **kwargs), kwargs.get("dtype_backend"))
             print(tabulate(data.head(n), headers='keys', tablefmt='grid', showindex=False))
+            return data
         except Exception as e:
             print(f"Error al previsualizar los datos: {e}")
             raise
@@ -44,10 +263,14 @@ class CSVExtractor:
         Guarda datos en un archivo CSV.
         
         Args:
-            df: DataFrame a guardar
+            df: DataFrame a guardar (o iterador de DataFrames)
             filename: Ruta del archivo destino (si None, usa self.file_path)
             write_header: Si escribe encabezados
-            mode: "replace" (sobreescribe) o "append" (añade)
+            mode: "replace" (sobreescribe) o "append" (añade). En modo append solo se escriben
+                  las filas nuevas al final del archivo; el encabezado existente se compara con
+                  las columnas del DataFrame sin leer el resto del archivo.
+                  Si el destino está comprimido (.gz, .bz2, .xz, .zst) las filas se añaden
+                  como un nuevo miembro/frame comprimido, sin descomprimir lo existente.
             **kwargs: Argumentos adicionales para pd.to_csv()
         """
         if filename is None:
@@ -59,23 +282,71 @@ class CSVExtractor:
                 df = df[1:]
                 df = df.reset_index(drop=True)
 
-        table = etl.fromdataframe(df)
+        kwargs.setdefault("index", False)
         
         try:
-            if mode == "append" and os.path.exists(filename):
-                # Modo append usando petl
-                existing = etl.fromcsv(filename)
-                combined = etl.cat(existing, table)
-                etl.tocsv(combined, filename, write_header=write_header)
+            if mode == "append" and os.path.exists(filename) and os.path.getsize(filename) > 0:
+                self._append_csv(df, filename, **kwargs)
             else:
                 # Modo replace o archivo nuevo
-                etl.tocsv(table, filename, write_header=write_header)
+                self._write_csv(df, filename, write_header, "w", **kwargs)
             
             print(f"Datos guardados en el archivo '{filename}' (modo: {mode}).")
         except Exception as e:
             print(f"Error al guardar los datos en el archivo CSV: {e}")
             raise
 
+    @staticmethod
+    def _write_csv(df, filename, write_header, file_mode, **kwargs):
+        """Escribe el DataFrame (o cada bloque del iterador) directamente con to_csv."""
+        chunks = df if is_chunk_stream(df) else [df]
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(filename, mode=file_mode if i == 0 else "a",
+                         header=write_header and i == 0, **kwargs)
+
+    def _append_csv(self, df, filename, **kwargs):
+        """
+        Añade filas al final de un CSV existente. Solo se lee la primera línea del archivo
+        para validar el encabezado, por lo que el costo depende de las filas nuevas.
+        """
+        sep = kwargs.get("sep", ",")
+        encoding = kwargs.get("encoding") or "utf-8"
+        codec = kwargs.setdefault("compression", detect_codec(filename))
+        if codec and codec not in APPENDABLE:
+            raise ValueError(f"No se pueden añadir filas a un archivo comprimido con {codec}")
+
+        # Solo se descomprime/lee la primera línea
+        with open_text(filename, codec, encoding) as f:
+            existing_header = next(csv.reader(f, delimiter=sep), [])
+        if existing_header:
+            existing_header[0] = existing_header[0].lstrip("\ufeff")
+
+        # Si el archivo no termina en salto de línea, se agrega antes de las filas nuevas
+        if not codec:
+            with open(filename, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) not in (b"\n", b"\r")
+            if needs_newline:
+                with open(filename, "a", newline="", encoding=encoding) as f:
+                    f.write(kwargs.get("lineterminator", os.linesep))
+
+        def align(chunk):
+            columns = [str(col) for col in chunk.columns]
+            if kwargs.get("index"):
+                columns = [str(chunk.index.name or "")] + columns
+            if columns == existing_header:
+                return chunk
+            if not kwargs.get("index") and sorted(columns) == sorted(existing_header):
+                # Mismas columnas en distinto orden: se reordenan según el archivo
+                return chunk[[chunk.columns[columns.index(col)] for col in existing_header]]
+            raise ValueError(
+                f"Las columnas {columns} no coinciden con el encabezado existente {existing_header}"
+            )
+
+        chunks = df if is_chunk_stream(df) else [df]
+        for chunk in chunks:
+            align(chunk).to_csv(filename, mode="a", header=False, **kwargs)
+
 
 # Ejemplo de uso
 if __name__ == "__main__":
@@ -1,8 +1,26 @@
-from sqlalchemy import create_engine
+import datetime
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from decimal import Decimal
+from sqlalchemy import URL, Column, Date, DateTime, Float, Integer, MetaData, Numeric, Table, func, select, text
 import pandas as pd
+from etl.config import arrow_dates, with_dtype_backend
+from etl.engines import dispose_engine, get_engine
+from etl.extractors.lazy_table import LazyTable
+from etl.state import StateStore
 
 class DB_Extractor:
-    def __init__(self, db_type, password, database, host="localhost", user="root", port=None, service_name=None):
+    def __init__(self, db_type, password, database, host="localhost", user="root", port=None, service_name=None,
+                 cache=None, cache_ttl=None):
+        """
+        Args:
+            cache: ColumnarCache opcional; los resultados de execute_query se guardan en ella
+                   y las consultas repetidas se leen del disco sin ir a la base de datos
+            cache_ttl: Segundos de vigencia de los resultados en caché (None = sin vencimiento)
+        """
+        self.cache = cache
+        self.cache_ttl = cache_ttl
         self.db_type = db_type.lower()
         self.host = host
         self.user = user
@@ -11,6 +29,8 @@ class DB_Extractor:
         self.service_name = service_name
         self.port = port or self._default_port()
         self.engine = None
+        self.last_incremental = None
+        self.last_extraction = None
 
     def _default_port(self):
         if self.db_type == "mysql":
@@ -19,49 +39,163 @@ class DB_Extractor:
             return 5432
         elif self.db_type == "oracle":
             return 1521
+        elif self.db_type == "sqlite":
+            return None
         else:
             raise ValueError("Tipo de base de datos no soportado.")
 
-    def connect(self):
-        try:
-            if self.db_type == "mysql":  
-                self.engine = create_engine(
-                    f"mysql+pymysql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
-                )
-            elif self.db_type == "postgresql":
-                self.engine = create_engine(
-                    f"postgresql+psycopg2://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}",
-                    connect_args={'client_encoding': 'latin1'}
-                )
-            elif self.db_type == "oracle":
-                if not self.service_name:
-                    raise ValueError("Debe proporcionar 'service_name' para Oracle.")
-                
-                dsn = f"(DESCRIPTION=(ADDRESS=(PROTOCOL=TCP)(HOST={self.host})(PORT={self.port}))(CONNECT_DATA=(SERVICE_NAME={self.service_name})))"
-                self.engine = create_engine(f"oracle+cx_oracle://{self.user}:{self.password}@{dsn}")
-            else:
-                raise ValueError("Tipo de base de datos no soportado. Usa 'mysql', 'postgresql' o 'oracle'.")
+    def _url(self):
+        """URL de SQLAlchemy de la base de datos (la contraseña se escapa correctamente)"""
+        if self.db_type == "mysql":
+            return URL.create("mysql+pymysql", self.user, self.password, self.host, self.port, self.database)
+        elif self.db_type == "postgresql":
+            return URL.create("postgresql+psycopg2", self.user, self.password, self.host, self.port, self.database)
+        elif self.db_type == "oracle":
+            if not self.service_name:
+                raise ValueError("Debe proporcionar 'service_name' para Oracle.")
+            return URL.create("oracle+cx_oracle", self.user, self.password, self.host, self.port,
+                              query={"service_name": self.service_name})
+        elif self.db_type == "sqlite":
+            # 'database' es la ruta del archivo (útil como sustituto local en pruebas)
+            return URL.create("sqlite", database=self.database)
+        else:
+            raise ValueError("Tipo de base de datos no soportado. Usa 'mysql', 'postgresql', 'oracle' o 'sqlite'.")
+
+    def connect(self, **pool_options):
+        """
+        Obtiene el engine compartido del registro de etl.engines para esta base de datos.
+
+        No abre ninguna conexión: el pool las crea al primer uso y las reutiliza entre todos
+        los extractores y loaders del proceso con la misma DSN (pool_pre_ping descarta las
+        que el servidor haya cerrado).
 
-            with self.engine.connect():
-                print(f"✅ Conexión exitosa a {self.db_type.upper()} en la base de datos '{self.database}'.")
+        Args:
+            **pool_options: pool_size, max_overflow, pool_recycle... para este engine
+                            (con otras opciones se usa un engine distinto del registro)
+        """
+        try:
+            if self.db_type == "postgresql":
+                pool_options.setdefault("connect_args", {'client_encoding': 'latin1'})
+            self.engine = get_engine(self._url(), **pool_options)
+            print(f"✅ Engine de {self.db_type.upper()} listo para la base de datos '{self.database}' (pool compartido).")
         except Exception as e:
             print(f"❌ Error al conectar a la base de datos: {e}")
             raise
 
-    def close_connection(self):
+    @property
+    def dsn(self):
+        """
+        DSN de la base de datos, con contraseña. DB_Loader(dsn) usa el engine registrado sin
+        argumentos (en PostgreSQL, sin el client_encoding del extractor); para compartir el
+        pool y la configuración del extractor, pase DB_Loader(extractor.engine).
+        """
+        return self._url().render_as_string(hide_password=False)
+
+    def close_connection(self, dispose=False):
+        """
+        Suelta el engine. Las conexiones quedan abiertas en el pool compartido para el
+        siguiente trabajo del proceso; con dispose=True además se cierran y el engine se
+        quita del registro.
+        """
         if self.engine:
-            self.engine.dispose()
+            if dispose:
+                dispose_engine(self._url())
+            self.engine = None
             print("🔒 Conexión cerrada.")
 
-    
+    def _stream(self, read, chunksize, fetch_size, dtype_backend=None):
+        """
+        Generador que entrega el resultado por bloques usando un cursor del lado del servidor.
+
+        La conexión se abre con stream_results (cursor con nombre en PostgreSQL, SSCursor en
+        MySQL, arraysize en Oracle) y yield_per, de modo que el driver solo trae 'fetch_size'
+        filas por viaje y la memoria depende del tamaño del bloque, no del de la tabla.
+        La conexión se devuelve al pool al agotar o cerrar el iterador. Con dtype_backend
+        "pyarrow" las fechas de cada bloque pasan a timestamp de Arrow (ver arrow_dates).
+        """
+        fetch_size = fetch_size or chunksize
+        with self.engine.connect() as connection:
+            connection = connection.execution_options(stream_results=True, yield_per=fetch_size)
+            for chunk in read(connection, chunksize):
+                yield arrow_dates(chunk, dtype_backend)
+
+    @staticmethod
+    def _normalize_sql(sql):
+        """SQL sin diferencias de espacios ni ';' final (los literales entre comillas no se tocan)"""
+        parts = re.split(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")", sql.strip().rstrip(";"))
+        return "".join(part if i % 2 else re.sub(r"\s+", " ", part) for i, part in enumerate(parts))
+
+    @staticmethod
+    def table_probe(table_name, updated_column=None):
+        """
+        Consulta de sondeo para invalidar la caché cuando cambia una tabla: número de filas y,
+        si se indica, el máximo de la columna de actualización. Se pasa como 'cache_probe'.
+        """
+        if updated_column is None:
+            return select(func.count()).select_from(Table(table_name, MetaData()))
+        table = Table(table_name, MetaData(), Column(updated_column))
+        return select(func.count(), func.max(table.c[updated_column]))
+
+    def _cache_key(self, connection, query, probe, kwargs):
+        """
+        Clave del resultado: SQL normalizado, parámetros, identidad de la conexión (DSN sin
+        contraseña) y, si hay sondeo, su resultado actual, de modo que un cambio en la
+        tabla produce otra clave.
+        """
+        if isinstance(query, str):
+            sql, bound = self._normalize_sql(query), None
+        else:
+            compiled = query.compile(self.engine)
+            sql, bound = self._normalize_sql(str(compiled)), compiled.params
+        if probe is None:
+            probe_value = None
+        elif callable(probe):
+            probe_value = probe(connection)
+        else:
+            probe = text(probe) if isinstance(probe, str) else probe
+            probe_value = list(connection.execute(probe).one())
+        identity = self.engine.url.render_as_string(hide_password=True)
+        return self.cache.make_key("sql", identity, sql, bound, probe_value, kwargs)
+
+    def execute_query(self, query, chunksize=None, fetch_size=None, use_cache=True, cache_probe=None, **kwargs):
+        """
+        Ejecuta una consulta SQL y devuelve un DataFrame.
 
-    def execute_query(self, query):
+        Args:
+            query: Consulta SQL (texto o sentencia de SQLAlchemy)
+            chunksize: Si se indica, devuelve un iterador de DataFrames de como máximo
+                       'chunksize' filas leídos con un cursor del lado del servidor
+            fetch_size: Filas que el driver trae por viaje al servidor (por defecto, chunksize)
+            use_cache: Si el extractor tiene caché, busca y guarda ahí el resultado (no se usa
+                       con 'chunksize')
+            cache_probe: Sondeo que invalida la caché cuando cambian los datos: consulta SQL
+                         de una fila (p. ej. DB_Extractor.table_probe("medico", "updated_at"))
+                         o función que recibe la conexión y retorna un valor serializable
+            **kwargs: Argumentos adicionales para pd.read_sql_query() (params, dtype, ...)
+        """
         try:
             if self.engine is None:
                 raise ValueError("No hay conexión activa. Llame a `connect()` primero.")
+            kwargs = with_dtype_backend(kwargs)
 
+            if chunksize:
+                print(f"Ejecutando consulta por bloques de {chunksize} filas.")
+                return self._stream(
+                    lambda conn, size: pd.read_sql_query(query, conn, chunksize=size, **kwargs),
+                    chunksize, fetch_size, kwargs.get("dtype_backend"),
+                )
+
+            cached = self.cache is not None and use_cache
             with self.engine.connect() as connection:
-                df = pd.read_sql_query(query, connection)
+                if cached:
+                    key = self._cache_key(connection, query, cache_probe, kwargs)
+                    df = self.cache.get(key, max_age=self.cache_ttl)
+                    if df is not None:
+                        print("✅ Consulta leída desde caché.")
+                        return df
+                df = arrow_dates(pd.read_sql_query(query, connection, **kwargs), kwargs.get("dtype_backend"))
+            if cached:
+                self.cache.put(key, df)
             
             print("✅ Consulta ejecutada con éxito.")
             return df
@@ -69,14 +203,368 @@ class DB_Extractor:
             print(f"❌ Error al ejecutar la consulta SQL: {e}")
             raise
 
-    def get_table(self, table_name):
+    def clear_cache(self):
+        """Elimina todos los resultados guardados en la caché del extractor"""
+        if self.cache is not None:
+            self.cache.clear()
+            print("🧹 Caché de consultas limpiada.")
+
+    @staticmethod
+    def _range_bounds(low, high, partitions):
+        """
+        Límites de 'partitions' rangos consecutivos entre low y high (incluidos) para una clave
+        numérica, decimal o de fecha. Los límites repetidos se eliminan, así que pueden salir
+        menos rangos que los pedidos (p. ej. pocas claves distintas).
+        """
+        if isinstance(low, (datetime.date, datetime.datetime)):
+            is_date = not isinstance(low, datetime.datetime)
+            lo, hi = pd.Timestamp(low).value, pd.Timestamp(high).value
+            bounds = [pd.Timestamp(lo + (hi - lo) * i // partitions) for i in range(partitions + 1)]
+            bounds = [b.date() if is_date else b.to_pydatetime() for b in bounds]
+        elif isinstance(low, int):
+            bounds = [low + (high - low) * i // partitions for i in range(partitions + 1)]
+        else:
+            bounds = [low + (high - low) * i / partitions for i in range(partitions + 1)]
+        bounds[0], bounds[-1] = low, high
+        return sorted(set(bounds))
+
+    def _reflect(self, table_name, columns=None, schema=None, key_column=None):
+        """Refleja la tabla y retorna (tabla, columnas seleccionadas) de SQLAlchemy Core"""
+        table = Table(table_name, MetaData(), schema=schema, autoload_with=self.engine)
+        if key_column is not None and key_column not in table.c:
+            raise ValueError(f"La columna '{key_column}' no existe en la tabla '{table_name}'.")
+        return table, [table.c[c] for c in columns] if columns else list(table.c)
+
+    @staticmethod
+    def _date_columns(selected):
+        """Igual que read_sql_table: las columnas de fecha se convierten según su tipo en la tabla"""
+        return [c.name for c in selected if isinstance(c.type, (Date, DateTime))]
+
+    def _partition_predicates(self, column, partitions, method):
+        """
+        Condiciones WHERE de cada partición, en el orden de la clave (nulos al final).
+        El tipo de la clave se comprueba en la tabla reflejada: "hash" necesita una clave
+        entera y "range" una numérica o de fecha (con otra, SQLite metería todas las filas
+        en una partición y otras bases darían un error del driver).
+        """
+        if method == "hash":
+            if not isinstance(column.type, Integer):
+                raise ValueError(f"partition_method='hash' requiere una clave entera; "
+                                 f"'{column.name}' es {column.type}.")
+            predicates = [func.abs(column) % partitions == i for i in range(partitions)]
+        elif method == "range":
+            if not isinstance(column.type, (Integer, Numeric, Float, Date, DateTime)):
+                raise ValueError(f"partition_method='range' requiere una clave numérica o de fecha; "
+                                 f"'{column.name}' es {column.type}.")
+            with self.engine.connect() as connection:
+                low, high = connection.execute(select(func.min(column), func.max(column))).one()
+            if low is None:
+                predicates = []
+            else:
+                bounds = self._range_bounds(low, high, partitions)
+                if len(bounds) == 1:
+                    predicates = [column == low]
+                else:
+                    predicates = [
+                        (column >= lo) & (column < hi if i < len(bounds) - 2 else column <= hi)
+                        for i, (lo, hi) in enumerate(zip(bounds, bounds[1:]))
+                    ]
+        else:
+            raise ValueError("partition_method debe ser 'range' o 'hash'.")
+        return predicates + [column.is_(None)]
+
+    def _read_partitioned(self, table_name, partition_column, partitions, workers, method,
+                          columns=None, schema=None, **kwargs):
+        """
+        Lee la tabla por particiones de la clave en paralelo: cada partición es un SELECT con
+        su propio WHERE que se ejecuta en un hilo con una conexión del pool del engine. Las
+        particiones se unen en el orden de la clave.
+        """
+        table, selected = self._reflect(table_name, columns, schema, partition_column)
+        key = table.c[partition_column]
+        keep_key = any(c.name == partition_column for c in selected)
+        if method == "hash" and not keep_key:
+            # La clave hace falta para ordenar las particiones al unirlas
+            selected.append(key)
+        predicates = self._partition_predicates(key, partitions, method)
+        kwargs.setdefault("parse_dates", self._date_columns(selected))
+
+        def read(predicate):
+            query = select(*selected).where(predicate).order_by(key)
+            with self.engine.connect() as connection:
+                return arrow_dates(pd.read_sql_query(query, connection, **kwargs), kwargs.get("dtype_backend"))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(read, predicates))
+
+        # Las particiones vacías, y las columnas que en una partición solo traen nulos, no
+        # tienen tipo propio (object, o null con Arrow) y arrastrarían object al unirlas:
+        # se descartan o toman el tipo de las demás particiones
+        parts = [part for part in parts if len(part)] or parts[:1]
+        reference = {}
+        for part in parts:
+            for col in part.columns:
+                if col not in reference and part[col].notna().any():
+                    reference[col] = part[col].dtype
+        parts = [part.astype({col: reference[col] for col in part.columns
+                              if col in reference and part[col].dtype != reference[col] and part[col].isna().all()})
+                 for part in parts]
+        df = pd.concat(parts, ignore_index="index_col" not in kwargs)
+        if method == "hash":
+            df = df.sort_values(partition_column, kind="stable", na_position="last")
+            if "index_col" not in kwargs:
+                df = df.reset_index(drop=True)
+            if not keep_key:
+                df = df.drop(columns=partition_column)
+        return df
+
+    def get_table(self, table_name, chunksize=None, fetch_size=None, partition_column=None,
+                  partitions=None, workers=None, partition_method="range", **kwargs):
+        """
+        Extrae una tabla completa.
+
+        Args:
+            table_name: Nombre de la tabla
+            chunksize: Si se indica, devuelve un iterador de DataFrames de como máximo
+                       'chunksize' filas leídos con un cursor del lado del servidor
+            fetch_size: Filas que el driver trae por viaje al servidor (por defecto, chunksize)
+            partition_column: Clave numérica o de fecha por la que se parte la tabla; si se
+                              indica, las particiones se leen en paralelo con varias conexiones
+            partitions: Número de particiones (por defecto, 'workers' o 4)
+            workers: Número de hilos/conexiones simultáneas (por defecto, 'partitions')
+            partition_method: "range" (rangos entre min y max de la clave) o "hash"
+                              (módulo de una clave entera, útil si la clave está sesgada)
+            **kwargs: Argumentos adicionales para pd.read_sql_table() (columns, schema, ...)
+
+        Ejemplo:
+            pagos = db.get_table("pagos", partition_column="id_pago", partitions=8)
+        """
         try:
             if self.engine is None:
                 raise ValueError("No hay conexión activa. Llame a connect() primero.")
+            kwargs = with_dtype_backend(kwargs)
+
+            if partition_column is not None:
+                if chunksize:
+                    raise ValueError("La lectura particionada no se combina con 'chunksize'.")
+                partitions = partitions or workers or 4
+                workers = workers or partitions
+                print(f"Extrayendo tabla '{table_name}' en {partitions} particiones por "
+                      f"'{partition_column}' ({workers} conexiones).")
+                df = self._read_partitioned(table_name, partition_column, partitions, workers,
+                                            partition_method, **kwargs)
+                print(f"✅ Tabla '{table_name}' extraída con éxito ({len(df)} registros).")
+                return df
+
+            if chunksize:
+                print(f"Extrayendo tabla '{table_name}' por bloques de {chunksize} filas.")
+                return self._stream(
+                    lambda conn, size: pd.read_sql_table(table_name, con=conn, chunksize=size, **kwargs),
+                    chunksize, fetch_size, kwargs.get("dtype_backend"),
+                )
             
-            df = pd.read_sql_table(table_name, con=self.engine)
+            df = arrow_dates(pd.read_sql_table(table_name, con=self.engine, **kwargs), kwargs.get("dtype_backend"))
             print(f"✅ Tabla '{table_name}' extraída con éxito.")
             return df
         except Exception as e:
             print(f"❌ Error al extraer la tabla '{table_name}': {e}")
             raise
+
+    def _extract_source(self, source):
+        """Extrae una fuente de extract_many: tabla, consulta SQL, sentencia o LazyTable"""
+        if getattr(source, "supports_pushdown", False):
+            return source.collect()
+        if isinstance(source, str) and not source.split(maxsplit=1)[1:]:
+            return self.get_table(source)
+        return self.execute_query(source)
+
+    def extract_many(self, sources, max_workers=4):
+        """
+        Extrae varias tablas o consultas a la vez, cada una en un hilo con su propia conexión
+        del pool del engine, de modo que el tiempo total se acerca al de la fuente más lenta
+        en lugar de la suma de todas.
+
+        Args:
+            sources: Lista de nombres de tabla o diccionario {nombre: fuente}, donde la fuente
+                     es un nombre de tabla, una consulta SQL, una sentencia de SQLAlchemy o
+                     una LazyTable
+            max_workers: Máximo de extracciones simultáneas (no debe superar el tamaño del
+                         pool: pool_size + max_overflow)
+        Returns:
+            {nombre: DataFrame} en el orden de 'sources'; las fuentes que fallan quedan en
+            None. self.last_extraction tiene por fuente los segundos, filas y error.
+        """
+        if self.engine is None:
+            raise ValueError("No hay conexión activa. Llame a connect() primero.")
+        if not isinstance(sources, dict):
+            sources = {name: name for name in sources}
+
+        def run(source):
+            start = time.perf_counter()
+            data = self._extract_source(source)
+            return data, time.perf_counter() - start
+
+        results = dict.fromkeys(sources)
+        report = {}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run, source): name for name, source in sources.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    data, seconds = future.result()
+                    results[name] = data
+                    report[name] = {"seconds": round(seconds, 3), "rows": len(data), "error": None}
+                except Exception as e:
+                    print(f"❌ Error extrayendo {name}: {e}")
+                    report[name] = {"seconds": None, "rows": None, "error": str(e)}
+        self.last_extraction = {name: report[name] for name in sources}
+
+        elapsed = time.perf_counter() - start
+        ok = sum(1 for r in report.values() if r["error"] is None)
+        print(f"⏱️ {ok}/{len(sources)} fuentes extraídas en {elapsed:.2f} s ({max_workers} simultáneas).")
+        return results
+
+    def lazy_table(self, table_name, schema=None):
+        """
+        Retorna una LazyTable: las selecciones de columnas y los filtros de DataSelect que se
+        le apliquen se compilan en un solo SELECT que se ejecuta con .collect().
+        """
+        try:
+            return LazyTable(self, table_name, schema=schema)
+        except Exception as e:
+            print(f"❌ Error al preparar la tabla '{table_name}': {e}")
+            raise
+
+    @staticmethod
+    def _encode_watermark(value):
+        """Marca de agua en forma serializable a JSON, conservando su tipo"""
+        if isinstance(value, datetime.datetime):
+            return {"type": "datetime", "value": value.isoformat()}
+        if isinstance(value, datetime.date):
+            return {"type": "date", "value": value.isoformat()}
+        if isinstance(value, Decimal):
+            return {"type": "decimal", "value": str(value)}
+        return {"type": "value", "value": value}
+
+    @staticmethod
+    def _decode_watermark(stored):
+        kind, value = stored["type"], stored["value"]
+        if kind == "datetime":
+            return datetime.datetime.fromisoformat(value)
+        if kind == "date":
+            return datetime.date.fromisoformat(value)
+        if kind == "decimal":
+            return Decimal(value)
+        return value
+
+    def get_table_incremental(self, table_name, watermark_column, state, key=None, full_refresh=False,
+                              chunksize=None, fetch_size=None, columns=None, schema=None, **kwargs):
+        """
+        Extrae solo las filas nuevas o actualizadas desde la ejecución anterior.
+
+        'watermark_column' debe crecer de forma monótona (id autoincremental, fecha de
+        actualización...). Al empezar se consulta su máximo actual y se leen las filas con
+        marca > última guardada y <= ese máximo; al terminar, el máximo queda como nueva marca
+        de agua en 'state'. Las filas que se inserten durante la extracción quedan para la
+        siguiente ejecución. Si no hay marca guardada, o se pide full_refresh, se lee la tabla
+        completa (incluidas las filas con marca nula) y se reinicia la marca.
+
+        Args:
+            table_name: Nombre de la tabla
+            watermark_column: Columna de marca de agua (numérica o de fecha)
+            state: StateStore (o ruta de su archivo JSON) donde se guarda la marca de agua
+            key: Clave de la marca (por defecto, DSN sin contraseña + tabla + columna)
+            full_refresh: Ignora la marca guardada y vuelve a extraer toda la tabla
+            chunksize: Si se indica, devuelve un iterador de DataFrames (cursor del lado del
+                       servidor); la marca se guarda cuando el iterador se consume por completo
+            fetch_size: Filas que el driver trae por viaje al servidor (por defecto, chunksize)
+            columns: Columnas a extraer (por defecto, todas)
+            schema: Esquema de la tabla
+            **kwargs: Argumentos adicionales para pd.read_sql_query()
+        Returns:
+            DataFrame con las filas nuevas ordenadas por la marca de agua (o iterador de
+            DataFrames). self.last_incremental indica si la lectura fue incremental o completa,
+            el rango de marcas leído y el número de filas.
+
+        Ejemplo:
+            pagos = db.get_table_incremental("pagos", "fecha_actualizacion", "estado_etl.json")
+        """
+        try:
+            if self.engine is None:
+                raise ValueError("No hay conexión activa. Llame a connect() primero.")
+            kwargs = with_dtype_backend(kwargs)
+            state = StateStore.resolve(state)
+            table, selected = self._reflect(table_name, columns, schema, watermark_column)
+            mark = table.c[watermark_column]
+            key = key or (f"{self.engine.url.render_as_string(hide_password=True)}/"
+                          f"{table.fullname}:{watermark_column}")
+
+            checkpoint = state.get(key)
+            if full_refresh:
+                reason = "full_refresh"
+            elif not checkpoint:
+                reason = "sin marca de agua"
+            elif checkpoint.get("column") != watermark_column:
+                reason = "columna de marca distinta"
+            else:
+                reason = None
+            since = None if reason else self._decode_watermark(checkpoint["watermark"])
+
+            with self.engine.connect() as connection:
+                until = connection.execute(select(func.max(mark))).scalar()
+
+            if reason:
+                print(f"Extracción completa de '{table_name}' ({reason}).")
+                # Sin marcas (todas nulas o tabla vacía) se leen igual las filas con marca nula
+                condition = (mark <= until) | mark.is_(None) if until is not None else mark.is_(None)
+                previous_rows = 0
+            else:
+                print(f"Extracción incremental de '{table_name}': {watermark_column} > {since}.")
+                condition = (mark > since) & (mark <= until) if until is not None else None
+                previous_rows = checkpoint.get("rows", 0)
+            self.last_incremental = {"mode": "full" if reason else "incremental", "reason": reason,
+                                     "since": since, "until": until, "rows": None}
+
+            query = select(*selected).order_by(mark)
+            # Incremental sin marcas nuevas: no hay nada que leer (se consulta igual para obtener
+            # las columnas)
+            query = query.where(condition) if condition is not None else query.where(False)
+            kwargs.setdefault("parse_dates", self._date_columns(selected))
+
+            def save(rows):
+                self.last_incremental["rows"] = rows
+                if until is None:
+                    print(f"'{watermark_column}' no tiene valores en '{table_name}'; no se guarda marca de agua.")
+                    return
+                if not reason and rows == 0 and until == since:
+                    print(f"Sin filas nuevas en '{table_name}'; la marca de agua no cambia.")
+                    return
+                state.set(key, {"column": watermark_column, "watermark": self._encode_watermark(until),
+                                "rows": previous_rows + rows})
+                print(f"💾 Marca de agua guardada: {watermark_column} = {until} ({rows} filas nuevas)")
+
+            if chunksize:
+                chunks = self._stream(
+                    lambda conn, size: pd.read_sql_query(query, conn, chunksize=size, **kwargs),
+                    chunksize, fetch_size, kwargs.get("dtype_backend"),
+                )
+                return self._iter_incremental(chunks, save)
+
+            with self.engine.connect() as connection:
+                df = arrow_dates(pd.read_sql_query(query, connection, **kwargs), kwargs.get("dtype_backend"))
+            save(len(df))
+            print(f"✅ Tabla '{table_name}' extraída con éxito ({len(df)} registros).")
+            return df
+        except Exception as e:
+            print(f"❌ Error en la extracción incremental de '{table_name}': {e}")
+            raise
+
+    @staticmethod
+    def _iter_incremental(chunks, save):
+        """Generador de bloques de la extracción incremental; guarda la marca al terminar"""
+        rows = 0
+        for chunk in chunks:
+            rows += len(chunk)
+            yield chunk
+        save(rows)
@@ -0,0 +1,227 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from etl.compression import with_compression
+from etl.streaming import is_chunk_stream
+
+
+INT_TYPES = ["Int8", "Int16", "Int32", "Int64"]
+
+
+def _narrowest_int(lo, hi, start="Int8"):
+    """Tipo entero anulable más pequeño (desde 'start') que cubre el rango [lo, hi]"""
+    for name in INT_TYPES[INT_TYPES.index(start):]:
+        info = np.iinfo(name.lower())
+        if info.min <= lo and hi <= info.max:
+            return name
+    return "Int64"
+
+
+class DtypePlan:
+    """
+    Plan de tipos para aplicar al momento de leer un CSV.
+
+    Contiene un diccionario {columna: dtype} y la lista de columnas de fecha, listos para
+    pasarse a pd.read_csv() mediante los argumentos 'dtype' y 'parse_dates'.
+
+    'downcasts' ({columna: Int8/Int16/Int32}) son enteros que se leen como Int64 y se reducen
+    después de leer (downcast()): pandas no valida desbordamientos al leer con un dtype entero
+    pequeño (300 leído como Int8 queda en 44), así que el rango se comprueba con los datos
+    reales y, si no caben en el tipo planeado, se usa uno más ancho.
+    """
+
+    def __init__(self, dtypes=None, parse_dates=None, downcasts=None):
+        self.dtypes = dict(dtypes or {})
+        self.parse_dates = list(parse_dates or [])
+        self.downcasts = dict(downcasts or {})
+        for col in self.downcasts:
+            self.dtypes.setdefault(col, "Int64")
+
+    def to_read_kwargs(self):
+        """Argumentos para pd.read_csv() derivados del plan"""
+        kwargs = {}
+        if self.dtypes:
+            kwargs["dtype"] = dict(self.dtypes)
+        if self.parse_dates:
+            kwargs["parse_dates"] = list(self.parse_dates)
+        return kwargs
+
+    def apply(self, read_kwargs):
+        """
+        Combina el plan con los argumentos de lectura indicados por el usuario.
+        Los tipos explícitos del usuario tienen prioridad sobre los del plan.
+        """
+        kwargs = dict(read_kwargs)
+        user_dtype = kwargs.get("dtype")
+        if isinstance(user_dtype, dict) or user_dtype is None:
+            dtype = {**self.dtypes, **(user_dtype or {})}
+            # usecols: no se pasan tipos de columnas que no se van a leer
+            usecols = kwargs.get("usecols")
+            if usecols is not None and not callable(usecols):
+                dtype = {col: dt for col, dt in dtype.items() if col in usecols}
+            if dtype:
+                kwargs["dtype"] = dtype
+        if self.parse_dates and "parse_dates" not in kwargs:
+            usecols = kwargs.get("usecols")
+            dates = [col for col in self.parse_dates
+                     if usecols is None or callable(usecols) or col in usecols]
+            if dates:
+                kwargs["parse_dates"] = dates
+        return kwargs
+
+    def downcast(self, data):
+        """
+        Reduce las columnas de 'downcasts' leídas como Int64 al tipo planeado, o al más
+        pequeño que cubra sus valores si alguno queda fuera del rango planeado.
+        Acepta un DataFrame, un iterador de DataFrames o un diccionario {hoja: datos}.
+        """
+        if not self.downcasts:
+            return data
+        if isinstance(data, dict):
+            return {name: self.downcast(value) for name, value in data.items()}
+        if is_chunk_stream(data):
+            return (self._downcast_frame(chunk) for chunk in data)
+        return self._downcast_frame(data)
+
+    def _downcast_frame(self, df):
+        for col, planned in self.downcasts.items():
+            # Solo las columnas leídas con el Int64 del plan (no las que el usuario tipó)
+            if col not in df.columns or str(df[col].dtype) != "Int64":
+                continue
+            name = planned
+            if df[col].notna().any():
+                name = _narrowest_int(int(df[col].min()), int(df[col].max()), planned)
+                if name != planned:
+                    print(f"⚠️ '{col}' tiene valores fuera del rango de {planned}; se usa {name}.")
+            df[col] = df[col].astype(name)
+        return df
+
+    def save(self, path):
+        """Guarda el plan en un archivo JSON para reutilizarlo en otras ejecuciones"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"dtypes": self.dtypes, "parse_dates": self.parse_dates,
+                       "downcasts": self.downcasts}, f, ensure_ascii=False, indent=2)
+        print(f"💾 Plan de tipos guardado en: {path}")
+
+    @classmethod
+    def load(cls, path):
+        """Carga un plan guardado con save()"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        dtypes, downcasts = dict(data.get("dtypes") or {}), data.get("downcasts")
+        if downcasts is None:
+            # Planes anteriores: los enteros pequeños pasan a leerse como Int64 y reducirse
+            downcasts = {col: dt for col, dt in dtypes.items() if dt in INT_TYPES[:-1]}
+            dtypes.update(dict.fromkeys(downcasts, "Int64"))
+        return cls(dtypes, data.get("parse_dates"), downcasts)
+
+    @classmethod
+    def resolve(cls, plan):
+        """Acepta un DtypePlan o la ruta de un plan guardado"""
+        if plan is None or isinstance(plan, cls):
+            return plan
+        return cls.load(plan)
+
+    def __repr__(self):
+        return f"DtypePlan(dtypes={self.dtypes}, parse_dates={self.parse_dates}, downcasts={self.downcasts})"
+
+
+class DtypePlanner:
+    """
+    Construye un DtypePlan a partir de una muestra del archivo.
+
+    - Enteros tipo código (pocos valores distintos): se leen como Int64 y se reducen al
+      tipo entero anulable más pequeño que cubre el rango observado, ampliado por
+      'int_margin', comprobando el rango real después de leer (DtypePlan.downcast).
+    - Textos de baja cardinalidad (sexo, estracto, nivel_escolaridad...): 'category'.
+    - Textos que se interpretan como fechas: se agregan a parse_dates.
+    """
+
+    def __init__(self, sample_rows=10000, category_ratio=0.5, max_categories=1000,
+                 date_ratio=0.95, int_margin=2, downcast_floats=False):
+        """
+        Args:
+            sample_rows: Filas iniciales del archivo usadas como muestra
+            category_ratio: Proporción máxima de valores únicos para usar 'category'
+            max_categories: Número máximo de valores únicos para usar 'category'
+            date_ratio: Proporción mínima de valores que deben interpretarse como fecha
+            int_margin: Factor con el que se amplía el rango entero observado
+            downcast_floats: Si True, usa float32 en lugar de float64
+        """
+        self.sample_rows = sample_rows
+        self.category_ratio = category_ratio
+        self.max_categories = max_categories
+        self.date_ratio = date_ratio
+        self.int_margin = int_margin
+        self.downcast_floats = downcast_floats
+
+    def plan_csv(self, file_path, **read_kwargs):
+        """
+        Lee una muestra del CSV y devuelve el DtypePlan correspondiente.
+        Args:
+            file_path: Ruta del archivo CSV
+            **read_kwargs: Argumentos de lectura (sep, encoding...) usados también en la lectura final
+        """
+        try:
+            sample = pd.read_csv(file_path, nrows=self.sample_rows, **with_compression(file_path, read_kwargs))
+            plan = self.plan_dataframe(sample)
+            print(f"✅ Plan de tipos generado con {len(sample)} filas de muestra: {file_path}")
+            return plan
+        except Exception as e:
+            print(f"❌ Error al generar el plan de tipos: {e}")
+            raise
+
+    def plan_dataframe(self, sample):
+        """Devuelve el DtypePlan para una muestra ya cargada"""
+        dtypes = {}
+        parse_dates = []
+        downcasts = {}
+        for col in sample.columns:
+            series = sample[col]
+            non_null = series.dropna()
+            if non_null.empty:
+                continue
+            if pd.api.types.is_bool_dtype(series):
+                dtypes[col] = "boolean"
+            elif pd.api.types.is_integer_dtype(series) or (
+                pd.api.types.is_float_dtype(series) and (non_null == non_null.round()).all()
+            ):
+                # Solo se reduce el ancho de columnas tipo código (dominio cerrado); los ids y
+                # montos conservan int64/float64. La lectura es con Int64 y la reducción se
+                # hace después de comprobar el rango real (pandas no valida desbordamientos)
+                if self._is_low_cardinality(non_null):
+                    dtypes[col] = "Int64"
+                    name = self._int_type(non_null.min(), non_null.max())
+                    if name != "Int64":
+                        downcasts[col] = name
+            elif pd.api.types.is_float_dtype(series):
+                if self.downcast_floats:
+                    dtypes[col] = "float32"
+            elif pd.api.types.is_datetime64_any_dtype(series):
+                parse_dates.append(col)
+            elif self._looks_like_date(non_null):
+                parse_dates.append(col)
+            elif self._is_low_cardinality(non_null):
+                dtypes[col] = "category"
+        return DtypePlan(dtypes, parse_dates, downcasts)
+
+    def _int_type(self, minv, maxv):
+        lo = min(int(minv) * self.int_margin, 0)
+        hi = max(int(maxv) * self.int_margin, 0)
+        return _narrowest_int(lo, hi)
+
+    def _looks_like_date(self, values):
+        values = values.astype(str)
+        # Los números puros no se consideran fechas
+        if values.str.fullmatch(r"[-+]?\d+(\.\d+)?").all():
+            return False
+        if not values.str.contains(r"\d").all():
+            return False
+        parsed = pd.to_datetime(values, errors="coerce", format="mixed")
+        return parsed.notna().mean() >= self.date_ratio
+
+    def _is_low_cardinality(self, values):
+        nunique = values.nunique()
+        return nunique <= self.max_categories and nunique / len(values) <= self.category_ratio
@@ -0,0 +1,154 @@
+import pandas as pd
+from sqlalchemy import Float, and_, false, not_, or_, select
+
+from etl.config import backend_dtype
+
+
+class LazyTable:
+    """
+    Tabla de base de datos sin extraer: registra selecciones de columnas y filtros y los
+    compila en un único SELECT parametrizado que solo se ejecuta al pedir los datos.
+
+    Los métodos tienen la misma firma y semántica que los de DataSelect (incluido el manejo
+    de nulos con complement=True) y devuelven una nueva LazyTable, así que se pueden
+    encadenar o pasar directamente a DataSelect, que delega en ellos. Solo viajan desde el
+    servidor las filas y columnas que se usan.
+
+    Ejemplo:
+        citas = db.lazy_table("citas_generales")
+        citas = DataSelect.filter_equal(citas, "diagnostico", "cirugia")
+        citas = DataSelect.select_columns(citas, "id_cita", "fecha_solicitud", "fecha_atencion")
+        df = citas.collect()
+    """
+
+    # Marca usada por DataSelect para reconocer tablas diferidas sin importar esta clase
+    supports_pushdown = True
+
+    def __init__(self, extractor, table_name, schema=None):
+        """
+        Args:
+            extractor: DB_Extractor conectado
+            table_name: Nombre de la tabla
+            schema: Esquema de la tabla
+        Solo se leen los metadatos de la tabla (nombres y tipos de columnas).
+        """
+        if extractor.engine is None:
+            raise ValueError("No hay conexión activa. Llame a connect() primero.")
+        self.extractor = extractor
+        self.table_name = table_name
+        self.table, self._selected = extractor._reflect(table_name, schema=schema)
+        self._predicates = []
+
+    @property
+    def columns(self):
+        """Columnas que tendrá el resultado"""
+        return pd.Index([c.name for c in self._selected])
+
+    def _derive(self, selected=None, predicate=None):
+        lazy = object.__new__(LazyTable)
+        lazy.__dict__.update(self.__dict__)
+        lazy._selected = self._selected if selected is None else selected
+        lazy._predicates = self._predicates + ([predicate] if predicate is not None else [])
+        return lazy
+
+    def _column(self, field):
+        if field not in self.columns:
+            raise ValueError(f"El campo '{field}' no existe en el DataFrame.")
+        return self.table.c[field]
+
+    def _filter(self, mask, complement, show, nulls=None):
+        """
+        Agrega el filtro 'mask' (o su complemento). En pandas la máscara es False en los nulos,
+        así que el complemento los incluye; en SQL NOT(...) los descartaría, por eso se agrega
+        la condición 'nulls' (columna IS NULL) al complemento.
+        """
+        if complement:
+            mask = not_(mask) if nulls is None else or_(not_(mask), nulls)
+        lazy = self._derive(predicate=mask)
+        if show:
+            print(f"Consulta diferida: {lazy.sql()}")
+        return lazy
+
+    def filter_equal(self, field, value, complement=False, show=0):
+        column = self._column(field)
+        # En pandas '== None' no coincide con nada; en SQLAlchemy se traduciría a IS NULL
+        mask = false() if value is None else column == value
+        return self._filter(mask, complement, show, column.is_(None))
+
+    def filter_not_equal(self, field, value, complement=False, show=0):
+        return self.filter_equal(field, value, not complement, show)
+
+    def filter_in_range(self, field, minv, maxv, complement=False, show=0):
+        if not (isinstance(minv, (int, float)) and isinstance(maxv, (int, float))):
+            raise TypeError("minv y maxv deben ser numéricos")
+        column = self._column(field)
+        return self._filter(column.between(minv, maxv), complement, show, column.is_(None))
+
+    def filter_in_list(self, field, values, complement=False, show=0):
+        if not isinstance(values, (list, set, tuple)):
+            raise ValueError("El parámetro 'values' debe ser una lista, conjunto o tupla.")
+        column = self._column(field)
+        present = [v for v in values if not pd.isna(v)]
+        if len(present) < len(values):
+            # isin() de pandas también acepta los nulos si la lista incluye None/NaN
+            return self._filter(or_(column.in_(present), column.is_(None)), complement, show)
+        return self._filter(column.in_(present), complement, show, column.is_(None))
+
+    def filter_is_null(self, field, complement=False, show=0):
+        column = self._column(field)
+        return self._filter(column.is_not(None) if complement else column.is_(None), False, show)
+
+    def select_not_none(self, field, complement=False, show=0):
+        return self.filter_is_null(field, not complement, show)
+
+    def select_columns(self, *columns, complement=False, show=0):
+        if complement:
+            selected = [c for c in self._selected if c.name not in columns]
+        else:
+            missing = [c for c in columns if c not in self.columns]
+            if missing:
+                raise KeyError(f"Columnas no encontradas: {missing}")
+            selected = [self.table.c[c] for c in columns]
+        lazy = self._derive(selected=selected)
+        if show:
+            print(f"Consulta diferida: {lazy.sql()}")
+        return lazy
+
+    def statement(self, limit=None):
+        """SELECT de SQLAlchemy Core con las columnas y filtros registrados"""
+        query = select(*self._selected)
+        if self._predicates:
+            query = query.where(and_(*self._predicates))
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    def sql(self):
+        """Texto del SELECT en el dialecto del engine (los valores van como parámetros)"""
+        return str(self.statement().compile(self.extractor.engine))
+
+    def collect(self, chunksize=None, fetch_size=None, **kwargs):
+        """
+        Ejecuta la consulta y devuelve un DataFrame (o un iterador de DataFrames si se indica
+        'chunksize', leído con un cursor del lado del servidor).
+        **kwargs: Argumentos adicionales para pd.read_sql_query()
+        """
+        return self.extractor.execute_query(self.statement(), chunksize=chunksize,
+                                            fetch_size=fetch_size, **self._read_kwargs(kwargs))
+
+    def head(self, n=5, **kwargs):
+        """Primeras n filas (LIMIT n en el servidor)"""
+        return self.extractor.execute_query(self.statement(limit=n), **self._read_kwargs(kwargs))
+
+    def _read_kwargs(self, kwargs):
+        """
+        Tipos tomados de la tabla, como en read_sql_table: sin ellos, un resultado filtrado
+        con solo nulos en una columna de fechas o reales llegaría como object.
+        """
+        kwargs.setdefault("parse_dates", self.extractor._date_columns(self._selected))
+        float_dtype = backend_dtype("float")
+        kwargs.setdefault("dtype", {c.name: float_dtype for c in self._selected if isinstance(c.type, Float)})
+        return kwargs
+
+    def __repr__(self):
+        return f"LazyTable({self.table_name!r}, columnas={len(self._selected)}, filtros={len(self._predicates)})"
@@ -0,0 +1,234 @@
+import io
+import mmap
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from etl.config import with_dtype_backend
+
+
+# Argumentos de pd.read_csv que no tienen sentido al parsear rangos de bytes sueltos
+UNSUPPORTED_KWARGS = ("header", "names", "skiprows", "skipfooter", "nrows", "chunksize",
+                      "iterator", "compression", "engine")
+
+
+def _count_quotes(mm, start, end, quote, block_size=16 * 1024 * 1024):
+    """Cuenta las comillas entre start y end leyendo el mmap por bloques acotados"""
+    total = 0
+    for pos in range(start, end, block_size):
+        total += mm[pos:min(pos + block_size, end)].count(quote)
+    return total
+
+
+def record_end(mm, pos, parity, quote):
+    """
+    Devuelve el offset donde empieza el siguiente registro a partir de 'pos'.
+    'parity' es la cantidad de comillas vistas desde el inicio del registro actual: un salto
+    de línea solo cierra el registro si las comillas abiertas están balanceadas.
+    """
+    size = len(mm)
+    while pos < size:
+        newline = mm.find(b"\n", pos)
+        if newline == -1:
+            return size
+        parity += _count_quotes(mm, pos, newline, quote)
+        if parity % 2 == 0:
+            return newline + 1
+        pos = newline + 1
+    return size
+
+
+def last_record_end(mm, start, quote=b'"'):
+    """
+    Offset donde termina el último registro completo a partir de 'start' (que debe ser inicio
+    de registro). Una línea final sin salto de línea, o un campo entre comillas sin cerrar,
+    se consideran incompletos (p. ej. un proceso que todavía está escribiendo el archivo).
+    """
+    end = mm.rfind(b"\n", start)
+    if end == -1:
+        return start
+    parity = _count_quotes(mm, start, end, quote)
+    while parity % 2:
+        prev = mm.rfind(b"\n", start, end)
+        if prev == -1:
+            return start
+        parity -= mm[prev:end].count(quote)
+        end = prev
+    return end + 1
+
+
+class ByteRangeReader(io.RawIOBase):
+    """Archivo de solo lectura limitado al rango [start, end) de otro archivo"""
+
+    def __init__(self, file_path, start, end):
+        super().__init__()
+        self._file = open(file_path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._file.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def split_byte_ranges(mm, start, parts, quote=b'"'):
+    """
+    Divide el mmap desde 'start' en como máximo 'parts' rangos (inicio, fin) que empiezan y
+    terminan en límites de registro, respetando saltos de línea dentro de campos entre comillas.
+    """
+    size = len(mm)
+    if start >= size:
+        return []
+    step = max((size - start) // parts, 1)
+    ranges = []
+    prev = start
+    while prev < size:
+        target = prev + step
+        if target >= size:
+            ranges.append((prev, size))
+            break
+        # La paridad de comillas se calcula desde el límite anterior, que es inicio de registro
+        parity = _count_quotes(mm, prev, target, quote)
+        end = record_end(mm, target, parity, quote)
+        ranges.append((prev, end))
+        prev = end
+    return ranges
+
+
+def _parse_range(file_path, start, end, columns, read_kwargs):
+    """
+    Parsea un rango de bytes del archivo. Está a nivel de módulo para ejecutarse en un
+    proceso del pool; cada proceso abre su propio mmap del archivo.
+    """
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    return pd.read_csv(io.BytesIO(data), header=None, names=columns, **read_kwargs)
+
+
+class ParallelCSVReader:
+    """
+    Lector de CSV que reparte un archivo grande entre varios procesos.
+
+    El archivo se mapea en memoria y se divide en rangos de bytes alineados a finales de
+    registro (teniendo en cuenta campos entre comillas). Cada rango se parsea en un proceso
+    del pool y los bloques se entregan en el orden del archivo. Solo se mantienen en vuelo
+    unos pocos rangos por proceso, de modo que la lectura por bloques usa memoria acotada.
+
+    En Windows el script que lo use debe estar protegido con if __name__ == "__main__".
+    """
+
+    def __init__(self, file_path, workers=None, chunk_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            file_path: Ruta del archivo CSV (sin comprimir)
+            workers: Número de procesos (por defecto, núcleos disponibles)
+            chunk_bytes: Tamaño aproximado en bytes de cada rango/bloque
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"El archivo {file_path} no existe.")
+        self.file_path = file_path
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+
+    def _plan(self, read_kwargs):
+        """Lee el encabezado y calcula los rangos de bytes de los datos"""
+        unsupported = [k for k in UNSUPPORTED_KWARGS if k in read_kwargs]
+        if unsupported:
+            raise ValueError(f"Argumentos no soportados en lectura paralela: {unsupported}")
+        encoding = read_kwargs.get("encoding") or "utf-8"
+        if encoding.lower().replace("-", "") in ("utf16", "utf32"):
+            raise ValueError("La lectura paralela requiere una codificación compatible con ASCII")
+        quote = read_kwargs.get("quotechar", '"').encode()
+        header_kwargs = {k: v for k, v in read_kwargs.items() if k in ("sep", "delimiter", "quotechar", "encoding")}
+        columns = list(pd.read_csv(self.file_path, nrows=0, **header_kwargs).columns)
+
+        with open(self.file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return columns, []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data_start = record_end(mm, 0, 0, quote)
+                size = len(mm)
+                parts = max(self.workers, -(-(size - data_start) // self.chunk_bytes))
+                ranges = split_byte_ranges(mm, data_start, parts, quote)
+        return columns, ranges
+
+    def iter_chunks(self, **read_kwargs):
+        """Genera los DataFrames de cada rango en el orden del archivo"""
+        read_kwargs = with_dtype_backend(read_kwargs)
+        columns, ranges = self._plan(read_kwargs)
+        if not ranges:
+            yield pd.DataFrame(columns=columns)
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            queue = iter(ranges)
+            for start, end in queue:
+                pending.append(executor.submit(_parse_range, self.file_path, start, end, columns, read_kwargs))
+                if len(pending) >= self.workers * 2:
+                    break
+            while pending:
+                chunk = pending.popleft().result()
+                nxt = next(queue, None)
+                if nxt is not None:
+                    pending.append(executor.submit(_parse_range, self.file_path, nxt[0], nxt[1], columns, read_kwargs))
+                yield chunk
+
+    def read(self, **read_kwargs):
+        """Lee el archivo completo en paralelo y devuelve un único DataFrame"""
+        chunks = list(self.iter_chunks(**read_kwargs))
+        return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def benchmark(rows=2_000_000, worker_counts=None):
+    """
+    Compara pd.read_csv con ParallelCSVReader para distinto número de procesos sobre un
+    archivo sintético, e imprime el tiempo y la aceleración de cada configuración.
+    """
+    import tempfile
+
+    import numpy as np
+
+    worker_counts = worker_counts or sorted({1, 2, 4, os.cpu_count() or 1})
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "benchmark.csv")
+        pd.DataFrame({
+            "id": np.arange(rows),
+            "valor": rng.random(rows) * 1000,
+            "sexo": rng.choice(["M", "F"], rows),
+            "comentario": rng.choice(['sin novedad', 'con "comillas", y coma', 'linea\nnueva'], rows),
+        }).to_csv(path, index=False)
+        size_mb = os.path.getsize(path) / 1024 ** 2
+
+        start = time.perf_counter()
+        base = pd.read_csv(path)
+        baseline = time.perf_counter() - start
+        print(f"Archivo: {rows} filas, {size_mb:.1f} MB")
+        print(f"pd.read_csv: {baseline:.2f} s")
+
+        for workers in worker_counts:
+            start = time.perf_counter()
+            df = ParallelCSVReader(path, workers=workers, chunk_bytes=16 * 1024 * 1024).read()
+            elapsed = time.perf_counter() - start
+            same = len(df) == len(base) and df["id"].equals(base["id"])
+            print(f"paralelo ({workers} procesos): {elapsed:.2f} s  x{baseline / elapsed:.2f}  "
+                  f"{'ok' if same else 'DIFERENTE'}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,144 @@
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+
+def _local(tag):
+    """Nombre sin espacio de nombres ('{ns}sheet' -> 'sheet'); cubre OOXML transicional y estricto"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _column_number(letters):
+    number = 0
+    for char in letters:
+        number = number * 26 + ord(char) - ord("A") + 1
+    return number
+
+
+def parse_dimension(ref):
+    """
+    Convierte una referencia de rango ('A1:K5000' o 'A1') en (filas, columnas).
+    Retorna (None, None) si la referencia no es válida.
+    """
+    cells = re.findall(r"\$?([A-Z]{1,3})\$?(\d+)", (ref or "").upper())
+    if not cells:
+        return None, None
+    (first_col, first_row), (last_col, last_row) = cells[0], cells[-1]
+    rows = int(last_row) - int(first_row) + 1
+    columns = _column_number(last_col) - _column_number(first_col) + 1
+    return rows, columns
+
+
+class WorkbookInspector:
+    """
+    Inspección de un libro .xlsx/.xlsm leyendo solo los metadatos del contenedor zip.
+
+    Los nombres y el estado de las hojas salen de xl/workbook.xml y sus relaciones. Las
+    dimensiones se toman del elemento <dimension> que está al inicio del XML de cada hoja:
+    solo se descomprime el comienzo de la hoja, sin leer ninguna celda. El número de filas
+    es aproximado (incluye el encabezado y depende de lo que haya escrito la aplicación).
+    """
+
+    WORKBOOK = "xl/workbook.xml"
+    WORKBOOK_RELS = "xl/_rels/workbook.xml.rels"
+
+    def __init__(self, file_path):
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"El archivo {file_path} no existe.")
+        self.file_path = file_path
+
+    @classmethod
+    def is_xlsx(cls, file_path):
+        """Indica si el archivo es un libro OOXML (los .xls y .ods usan otro formato)"""
+        if not zipfile.is_zipfile(file_path):
+            return False
+        with zipfile.ZipFile(file_path) as archive:
+            return cls.WORKBOOK in archive.NameToInfo
+
+    @classmethod
+    def sheet_parts(cls, archive):
+        """Lista de (nombre, estado, ruta de la parte XML) en el orden del libro (zip abierto)"""
+        targets = {}
+        if cls.WORKBOOK_RELS in archive.NameToInfo:
+            rels = ET.fromstring(archive.read(cls.WORKBOOK_RELS))
+            for rel in rels:
+                target = rel.get("Target", "")
+                if target.startswith("/"):
+                    part = target.lstrip("/")
+                else:
+                    part = posixpath.normpath(posixpath.join("xl", target))
+                targets[rel.get("Id")] = part
+
+        sheets = []
+        workbook = ET.fromstring(archive.read(cls.WORKBOOK))
+        for element in workbook.iter():
+            if _local(element.tag) != "sheet":
+                continue
+            rel_id = next((v for k, v in element.attrib.items() if _local(k) == "id"), None)
+            sheets.append((element.get("name"), element.get("state", "visible"), targets.get(rel_id)))
+        return sheets
+
+    @staticmethod
+    def _read_dimension(archive, part):
+        """Lee el XML de la hoja hasta <dimension> (o hasta el inicio de los datos)"""
+        if part is None or part not in archive.NameToInfo:
+            return None
+        with archive.open(part) as stream:
+            for _, element in ET.iterparse(stream, events=("start",)):
+                name = _local(element.tag)
+                if name == "dimension":
+                    return element.get("ref")
+                if name == "sheetData":
+                    return None
+        return None
+
+    def sheet_names(self):
+        """Nombres de las hojas en el orden del libro"""
+        with zipfile.ZipFile(self.file_path) as archive:
+            return [name for name, _, _ in self.sheet_parts(archive)]
+
+    def sheets(self):
+        """
+        Metadatos de cada hoja: nombre, estado (visible/hidden/veryHidden), rango de
+        <dimension>, filas y columnas aproximadas y tamaño descomprimido del XML en bytes.
+        """
+        result = []
+        with zipfile.ZipFile(self.file_path) as archive:
+            for name, state, part in self.sheet_parts(archive):
+                ref = self._read_dimension(archive, part)
+                rows, columns = parse_dimension(ref)
+                info = archive.NameToInfo.get(part)
+                result.append({
+                    "sheet": name,
+                    "state": state,
+                    "dimension": ref,
+                    "rows": rows,
+                    "columns": columns,
+                    "xml_bytes": info.file_size if info else None,
+                })
+        return result
+
+    @classmethod
+    def scan_directory(cls, directory, extensions=(".xlsx", ".xlsm"), recursive=False):
+        """
+        Inspecciona todos los libros de un directorio y devuelve un DataFrame con una fila
+        por hoja. Los archivos que no se pueden leer se informan y se omiten.
+        """
+        rows = []
+        if recursive:
+            paths = (os.path.join(root, f) for root, _, files in os.walk(directory) for f in files)
+        else:
+            paths = (entry.path for entry in os.scandir(directory) if entry.is_file())
+        for path in sorted(paths):
+            if not path.lower().endswith(extensions) or os.path.basename(path).startswith("~$"):
+                continue
+            try:
+                for sheet in cls(path).sheets():
+                    rows.append({"file": path, **sheet})
+            except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+                print(f"⚠️ No se pudo inspeccionar {path}: {e}")
+        return pd.DataFrame(rows, columns=["file", "sheet", "state", "dimension", "rows", "columns", "xml_bytes"])
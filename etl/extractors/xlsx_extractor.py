@@ -1,52 +1,339 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
 import pandas as pd
-import petl as etl
 from tabulate import tabulate
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from etl.config import with_dtype_backend
+from etl.streaming import reservoir_sample
+from etl.extractors.dtype_planner import DtypePlan
+from etl.extractors.workbook_inspector import WorkbookInspector
+from etl.loaders.xlsx_package import SheetOperation, XLSXPackage
+
+
+def _read_sheet_worker(file_path, sheet_name, read_kwargs):
+    """Lee una hoja; está a nivel de módulo para poder ejecutarse en un proceso del pool"""
+    return pd.read_excel(file_path, sheet_name=sheet_name, **read_kwargs)
+
+
+# Tipos estables de la lectura por bloques según el dtype_backend (con Arrow, ArrowDtype:
+# los mismos que devuelven read_excel con dtype_backend="pyarrow" y la caché columnar)
+_CHUNK_DTYPES = {
+    None: {"bool": "boolean", "int": "Int64", "float": "float64"},
+    "numpy_nullable": {"bool": "boolean", "int": "Int64", "float": "Float64", "str": "string"},
+}
+if pa is not None:
+    _CHUNK_DTYPES["pyarrow"] = {"bool": pd.ArrowDtype(pa.bool_()), "int": pd.ArrowDtype(pa.int64()),
+                                "float": pd.ArrowDtype(pa.float64()), "str": pd.ArrowDtype(pa.string())}
+
+
 class XLSXExtractor:
-    def __init__(self, file_path):
+    def __init__(self, file_path, cache=None):
+        """
+        Args:
+            file_path: Ruta del libro de Excel
+            cache: ColumnarCache opcional; cada hoja leída se guarda en formato columnar y
+                   las lecturas siguientes del libro sin cambios salen de la caché
+        """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"El archivo {file_path} no existe.")
         self.file_path = file_path
+        self.cache = cache
 
-    def read_sheet(self, sheet_name=None, **kwargs):
+    def _read_excel(self, sheet_name, fingerprint=None, **kwargs):
+        """
+        Lee una hoja con pd.read_excel pasando por la caché si está configurada.
+        'fingerprint' (ColumnarCache.source_fingerprint) evita identificar el libro otra vez
+        por cada hoja.
+        """
+        if self.cache is None:
+            return pd.read_excel(self.file_path, sheet_name=sheet_name, **kwargs)
+        key = self.cache.source_key(self.file_path, {"sheet_name": sheet_name, **kwargs}, fingerprint)
+        data = self.cache.get(key)
+        if data is None:
+            data = pd.read_excel(self.file_path, sheet_name=sheet_name, **kwargs)
+            self.cache.put(key, data)
+        return data
+
+    def read_sheet(self, sheet_name=None, chunksize=None, dtype_plan=None, sheets=None,
+                   parallel=False, workers=None, **kwargs):
+        """
+        Lee una hoja (o todas si sheet_name es None).
+
+        Args:
+            sheet_name: Nombre de la hoja; si es None se leen todas y se devuelve un diccionario
+            chunksize: Si se indica, la hoja se recorre en modo de solo lectura (streaming del
+                       XML, sin cargar el libro completo) y se devuelve un iterador de DataFrames
+                       de como máximo 'chunksize' filas, con memoria constante. Sin sheet_name se
+                       devuelve un diccionario {hoja: iterador}. En este modo solo se admiten
+                       'nrows', 'dtype', 'parse_dates' y 'dtype_backend'.
+            dtype_plan: DtypePlan (o ruta a un plan guardado) con los tipos a aplicar
+            sheets: Filtro de hojas cuando sheet_name es None: lista de nombres o función
+                    nombre -> bool (p. ej. lambda h: h.endswith("2024"))
+            parallel: Si True y sheet_name es None, cada hoja se parsea en un proceso distinto.
+                      El resultado es el mismo diccionario {hoja: DataFrame}
+            workers: Número de procesos del modo paralelo (por defecto, núcleos disponibles)
+            **kwargs: Argumentos adicionales para pd.read_excel()
+        En modo por bloques todos los bloques tienen los mismos tipos: los de 'dtype' y
+        'parse_dates' si se indican y, para el resto de columnas, los inferidos del primer bloque.
+        """
+        dtype_plan = DtypePlan.resolve(dtype_plan)
+        if dtype_plan is not None and dtype_plan.downcasts:
+            # Los enteros pequeños del plan se leen como Int64 y se reducen tras comprobar su rango
+            return dtype_plan.downcast(self.read_sheet(sheet_name, chunksize, sheets=sheets, parallel=parallel,
+                                                      workers=workers, **dtype_plan.apply(kwargs)))
         try:
+            dtype_plan = DtypePlan.resolve(dtype_plan)
+            if dtype_plan is not None:
+                kwargs = dtype_plan.apply(kwargs)
+            kwargs = with_dtype_backend(kwargs)
+            if chunksize:
+                if parallel:
+                    raise ValueError("La lectura paralela no se combina con chunksize")
+                unsupported = [k for k in kwargs if k not in ("nrows", "dtype", "parse_dates", "dtype_backend")]
+                if unsupported:
+                    raise ValueError(f"Argumentos no soportados en lectura por bloques: {unsupported}")
+                if sheet_name:
+                    print(f"Leyendo hoja '{sheet_name}' por bloques de {chunksize} filas.")
+                    return self._iter_typed_chunks(sheet_name, chunksize, **kwargs)
+                print(f"Leyendo todas las hojas por bloques de {chunksize} filas.")
+                return {name: self._iter_typed_chunks(name, chunksize, **kwargs)
+                        for name in self._select_sheets(sheets)}
             if sheet_name:
-                data = pd.read_excel(self.file_path, sheet_name=sheet_name, **kwargs)
+                data = self._read_excel(sheet_name, **kwargs)
                 print(f"Hoja '{sheet_name}' leída exitosamente.")
                 return data
             else:
-                all_sheets = pd.read_excel(self.file_path, sheet_name=None, **kwargs)
+                if parallel:
+                    all_sheets = self._read_sheets_parallel(self._select_sheets(sheets), workers, **kwargs)
+                elif self.cache is not None or sheets is not None:
+                    # El libro se identifica (y se hashea) una sola vez para todas las hojas
+                    fingerprint = self.cache.source_fingerprint(self.file_path) if self.cache is not None else None
+                    all_sheets = {name: self._read_excel(name, fingerprint, **kwargs)
+                                  for name in self._select_sheets(sheets)}
+                else:
+                    all_sheets = pd.read_excel(self.file_path, sheet_name=None, **kwargs)
                 print("Archivo leído exitosamente con todas las hojas.")
                 return all_sheets
         except Exception as e:
             print(f"Error al leer el archivo Excel: {e}")
             raise
 
+    def _select_sheets(self, sheets):
+        """Hojas del libro que pasan el filtro (lista de nombres o función), en orden del libro"""
+        names = self.get_sheet_names()
+        if sheets is None:
+            return names
+        if callable(sheets):
+            return [name for name in names if sheets(name)]
+        missing = [name for name in sheets if name not in names]
+        if missing:
+            raise ValueError(f"Hojas no encontradas en el libro: {missing}")
+        return [name for name in names if name in sheets]
+
+    def _read_sheets_parallel(self, names, workers, **kwargs):
+        """
+        Parsea cada hoja en un proceso del pool. Las hojas que ya están en la caché no se
+        envían al pool y las leídas se guardan en ella.
+        """
+        result = {}
+        keys = {}
+        if self.cache is not None:
+            fingerprint = self.cache.source_fingerprint(self.file_path)
+            for name in names:
+                keys[name] = self.cache.source_key(self.file_path, {"sheet_name": name, **kwargs}, fingerprint)
+                data = self.cache.get(keys[name])
+                if data is not None:
+                    result[name] = data
+        pending = [name for name in names if name not in result]
+        if pending:
+            workers = min(workers or os.cpu_count() or 1, len(pending))
+            print(f"Leyendo {len(pending)} hojas en paralelo con {workers} procesos.")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                frames = executor.map(_read_sheet_worker, repeat(self.file_path), pending, repeat(kwargs))
+                for name, data in zip(pending, frames):
+                    result[name] = data
+                    if self.cache is not None:
+                        self.cache.put(keys[name], data)
+        return {name: result[name] for name in names}
+
     def get_sheet_names(self):
+        """
+        Nombres de las hojas. En libros .xlsx solo se lee el manifiesto del zip
+        (WorkbookInspector); otros formatos (.xls, .ods) se abren con pd.ExcelFile.
+        """
         try:
-            xls = pd.ExcelFile(self.file_path)
-            return xls.sheet_names
+            if WorkbookInspector.is_xlsx(self.file_path):
+                return WorkbookInspector(self.file_path).sheet_names()
+            with pd.ExcelFile(self.file_path) as xls:
+                return xls.sheet_names
         except Exception as e:
             print(f"Error al obtener los nombres de las hojas: {e}")
             raise
 
-    def preview_data(self, sheet_name=None, n=5, **kwargs):
+    def inspect(self):
+        """
+        DataFrame con nombre, estado, dimensión y filas/columnas aproximadas de cada hoja,
+        leído solo de los metadatos del libro (sin parsear celdas).
+        """
+        try:
+            return pd.DataFrame(WorkbookInspector(self.file_path).sheets())
+        except Exception as e:
+            print(f"Error al inspeccionar el libro: {e}")
+            raise
+
+    def _iter_rows(self, sheet_name):
+        """
+        Itera las filas de una hoja (tuplas de valores) en modo de solo lectura de openpyxl,
+        que recorre el XML de la hoja sin construir el modelo completo del libro.
+        """
+        from openpyxl import load_workbook
+
+        wb = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            ws = wb[sheet_name] if sheet_name is not None else wb.worksheets[0]
+            for row in ws.iter_rows(values_only=True):
+                yield row
+        finally:
+            wb.close()
+
+    def _iter_sheet_chunks(self, sheet_name, chunksize, nrows=None):
+        """
+        Convierte las filas de una hoja en DataFrames de como máximo 'chunksize' filas.
+        La primera fila se usa como encabezado. Si se indica 'nrows' se deja de leer al alcanzarlo.
+        """
+        rows = self._iter_rows(sheet_name)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        buffer = []
+        read = 0
+        for row in rows:
+            buffer.append(row)
+            read += 1
+            if len(buffer) >= chunksize:
+                yield pd.DataFrame(buffer, columns=columns, index=pd.RangeIndex(read - len(buffer), read))
+                buffer = []
+            if nrows is not None and read >= nrows:
+                break
+        if buffer or read == 0:
+            yield pd.DataFrame(buffer, columns=columns, index=pd.RangeIndex(read - len(buffer), read))
+
+    def _iter_typed_chunks(self, sheet_name, chunksize, nrows=None, dtype=None, parse_dates=None,
+                           dtype_backend=None):
+        """
+        Bloques de una hoja con tipos estables: 'dtype' y 'parse_dates' se aplican a cada
+        bloque y las demás columnas se convierten a los tipos inferidos en el primer bloque
+        (en su versión con nulos o Arrow según 'dtype_backend').
+        """
+        dtype = dict(dtype or {})
+        parse_dates = list(parse_dates or [])
+        inferred = None
+        for chunk in self._iter_sheet_chunks(sheet_name, chunksize, nrows):
+            if inferred is None:
+                inferred = {}
+                for col in chunk.columns:
+                    if col not in dtype and col not in parse_dates:
+                        stable = self._stable_dtype(chunk[col], dtype_backend)
+                        if stable:
+                            inferred[col] = stable
+            yield self._coerce_chunk(chunk, dtype, parse_dates, inferred)
+
+    @staticmethod
+    def _stable_dtype(series, dtype_backend=None):
+        """
+        Tipo a mantener en todos los bloques para una columna del primer bloque. Los enteros y
+        booleanos usan tipos anulables porque un bloque posterior puede traer celdas vacías.
+        Con un dtype_backend los textos, reales y fechas también usan su tipo anulable/Arrow.
+        """
+        types = _CHUNK_DTYPES[dtype_backend]
+        series = series.infer_objects()
+        if pd.api.types.is_bool_dtype(series):
+            return types["bool"]
+        if pd.api.types.is_integer_dtype(series):
+            return types["int"]
+        if pd.api.types.is_float_dtype(series):
+            return types["float"]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            if dtype_backend == "pyarrow":
+                return pd.ArrowDtype(pa.timestamp(np.datetime_data(series.dtype)[0]))
+            return str(series.dtype)
+        if dtype_backend and pd.api.types.infer_dtype(series, skipna=True) == "string":
+            return types["str"]
+        return None
+
+    @staticmethod
+    def _coerce_chunk(chunk, dtype, parse_dates, inferred):
+        """Aplica los tipos a un bloque (los tipos explícitos fallan si no se pueden aplicar)"""
+        for col, dt in dtype.items():
+            if col in chunk.columns:
+                chunk[col] = chunk[col].astype(dt)
+        for col in parse_dates:
+            if col in chunk.columns:
+                chunk[col] = pd.to_datetime(chunk[col], errors="coerce")
+        for col, dt in inferred.items():
+            try:
+                chunk[col] = chunk[col].astype(dt)
+            except (ValueError, TypeError):
+                print(f"⚠️ La columna '{col}' no se pudo convertir a {dt} en este bloque; se deja como object.")
+        return chunk
+
+    def _preview_sheet(self, sheet_name, n, sample, random_state, chunksize, **kwargs):
+        if kwargs:
+            # Argumentos de pd.read_excel: se leen solo las n primeras filas
+            return pd.read_excel(self.file_path, sheet_name=sheet_name, nrows=n, **kwargs)
+        if sample:
+            return reservoir_sample(self._iter_sheet_chunks(sheet_name, chunksize), n, random_state)
+        return next(self._iter_sheet_chunks(sheet_name, n, nrows=n), pd.DataFrame())
+
+    def preview_data(self, sheet_name=None, n=5, sample=False, random_state=None, chunksize=10000, **kwargs):
+        """
+        Muestra una vista previa de una hoja (o de todas si sheet_name es None).
+        Las filas se leen con un iterador de solo lectura, por lo que el costo depende de n y no
+        del tamaño del libro. Con 'sample' se muestran n filas aleatorias (reservoir sampling).
+        **kwargs se pasan a pd.read_excel() limitado a las primeras n filas.
+        """
         try:
-            data = self.read_sheet(sheet_name, **kwargs)
             if sheet_name:
+                data = self._preview_sheet(sheet_name, n, sample, random_state, chunksize, **kwargs)
                 print(f"Hoja: {sheet_name}")
                 print(tabulate(data.head(n), headers='keys', tablefmt='grid', showindex=False))
+                return data
             else:
-                for name, df in data.items():
+                previews = {}
+                for name in self.get_sheet_names():
+                    df = self._preview_sheet(name, n, sample, random_state, chunksize, **kwargs)
+                    previews[name] = df
                     print(f"Hoja: {name}")
                     print(tabulate(df.head(n), headers='keys', tablefmt='grid', showindex=False))
                     print("-" * 40)
+                return previews
         except Exception as e:
             print(f"Error al previsualizar los datos: {e}")
             raise
 
-    def toxlsx(self, df, filename=None, sheet_name="Sheet1", write_header=True, mode="replace"):
+    def toxlsx(self, df, filename=None, sheet_name="Sheet1", write_header=True, mode="replace", index=False):
+        """
+        Guarda datos en una hoja de un libro .xlsx escribiendo las filas en streaming
+        directamente al XML de la hoja (memoria constante, tipos de columna conservados).
+
+        Args:
+            df: DataFrame a guardar (o iterador de DataFrames)
+            filename: Ruta del libro destino (si None, usa self.file_path)
+            sheet_name: Hoja destino
+            write_header: Si escribe encabezados
+            mode: "replace" (reemplaza la hoja y conserva las demás), "append" (añade filas al
+                  final de la hoja), "add" (agrega la hoja; falla si ya existe) u "overwrite"
+                  (el archivo queda solo con esta hoja)
+            index: Si escribe el índice del DataFrame como primera columna
+        """
         if filename is None:
             filename = self.file_path
 
@@ -56,22 +343,30 @@ class XLSXExtractor:
                 df = df[1:]
                 df = df.reset_index(drop=True)
 
-        table = etl.fromdataframe(df)
         try:
-            etl.toxlsx(table, filename, sheet=sheet_name, write_header=write_header, mode=mode)
+            if mode not in ("replace", "append", "add", "overwrite"):
+                raise ValueError(f"Modo no soportado: {mode}")
+            if mode == "add" and os.path.exists(filename) and \
+                    sheet_name.lower() in [name.lower() for name in WorkbookInspector(filename).sheet_names()]:
+                raise ValueError(f"La hoja '{sheet_name}' ya existe en {filename}")
+            kind = "append" if mode == "append" else "replace"
+            operation = SheetOperation(kind, sheet_name, df, index, None, write_header)
+            XLSXPackage(filename).apply([operation], overwrite=mode == "overwrite")
             print(f"Datos guardados en el archivo '{filename}', hoja '{sheet_name}'.")
         except Exception as e:
             print(f"Error al guardar los datos en el archivo Excel: {e}")
             raise
 
 
-ruta = r"C:\Users\rodri\Desktop\fecha.xlsx"
+# Ejemplo de uso
+if __name__ == "__main__":
+    ruta = r"C:\Users\rodri\Desktop\fecha.xlsx"
 
-extractor = XLSXExtractor(ruta)
+    extractor = XLSXExtractor(ruta)
 
-print("Hojas disponibles:", extractor.get_sheet_names())
+    print("Hojas disponibles:", extractor.get_sheet_names())
 
-extractor.preview_data(sheet_name="Sheet1", n=5)
+    extractor.preview_data(sheet_name="Sheet1", n=5)
 
-df = extractor.read_sheet(sheet_name="Sheet1")
-extractor.toxlsx(df, filename=r"C:\Users\rodri\Desktop\fecha_guardado.xlsx", sheet_name="Sheet1")
+    df = extractor.read_sheet(sheet_name="Sheet1")
+    extractor.toxlsx(df, filename=r"C:\Users\rodri\Desktop\fecha_guardado.xlsx", sheet_name="Sheet1")
@@ -1,6 +0,0 @@
-from .extractors.csv_extractor import CSVExtractor
-from .extractors.db_extractor import DBExtractor
-
-
-from .loaders.csv_loader import CSVLoader
-from .loaders.db_loader import DBLoader
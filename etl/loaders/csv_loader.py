@@ -1,12 +1,41 @@
+import datetime
 import pandas as pd
+import numpy as np
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from etl.streaming import is_chunk_stream
+from etl.extractors.dtype_planner import DtypePlan
+from etl.compression import strip_codec_extension, with_compression
+from etl.config import with_dtype_backend
+
+
+def _read_csv_columns(full_path, read_kwargs):
+    """
+    Lee un CSV y lo devuelve como columnas independientes.
+    Está a nivel de módulo para poder ejecutarse en un proceso del pool.
+    Returns:
+        Tuple (dict {columna: array}, número de registros, segundos de lectura)
+    """
+    start = time.perf_counter()
+    df = pd.read_csv(full_path, **with_compression(full_path, read_kwargs))
+    columns = {col: df[col].values for col in df.columns}
+    return columns, len(df), time.perf_counter() - start
 
 class CSV_Loader:
-    def __init__(self, base_path=None):
+    # Argumentos de pd.concat que merge_csvs respeta al unir las columnas
+    MERGE_CONCAT_KWARGS = ("join", "sort")
+
+    def __init__(self, base_path=None, cache=None):
         """
         Inicializa el cargador CSV con una ruta base opcional
+        Args:
+            base_path: Directorio base de los archivos
+            cache: ColumnarCache opcional para reutilizar lecturas de archivos sin cambios
         """
         self.base_path = base_path
+        self.cache = cache
         if self.base_path and not os.path.exists(self.base_path):
             os.makedirs(self.base_path)
             print(f"📂 Directorio creado: {self.base_path}")
@@ -17,64 +46,137 @@ class CSV_Loader:
             return os.path.join(self.base_path, filename)
         return filename
 
-    def load_csv(self, filename, sep=",", encoding="utf-8", **kwargs):
+    def load_csv(self, filename, sep=",", encoding="utf-8", chunksize=None, dtype_plan=None, **kwargs):
         """
         Carga un archivo CSV en un DataFrame
         Args:
             filename: Nombre del archivo (o ruta completa)
             sep: Separador de campos
             encoding: Codificación del archivo
+            chunksize: Si se indica, devuelve un iterador de DataFrames de 'chunksize' filas
+            dtype_plan: DtypePlan (o ruta a un plan guardado) aplicado durante la lectura
             **kwargs: Argumentos adicionales para pd.read_csv()
+        Los archivos comprimidos (.gz, .bz2, .xz, .zst, .zip) se detectan por extensión o por
+        sus primeros bytes y se descomprimen en streaming.
         Returns:
-            DataFrame con los datos cargados
+            DataFrame con los datos cargados (o iterador de DataFrames si se usa chunksize)
         """
+        dtype_plan = DtypePlan.resolve(dtype_plan)
+        if dtype_plan is not None and dtype_plan.downcasts:
+            # Los enteros pequeños del plan se leen como Int64 y se reducen tras comprobar su rango
+            return dtype_plan.downcast(self.load_csv(filename, sep, encoding, chunksize, **dtype_plan.apply(kwargs)))
         try:
+            dtype_plan = DtypePlan.resolve(dtype_plan)
+            if dtype_plan is not None:
+                kwargs = dtype_plan.apply(kwargs)
             full_path = self._get_full_path(filename)
+            kwargs = with_dtype_backend(with_compression(full_path, kwargs))
+            if chunksize:
+                print(f"✅ CSV abierto para lectura por bloques de {chunksize} filas: {full_path}")
+                return self._iter_chunks(full_path, chunksize, sep=sep, encoding=encoding, **kwargs)
+            if self.cache is not None:
+                key = self.cache.source_key(full_path, {"sep": sep, "encoding": encoding, **kwargs})
+                df = self.cache.get(key)
+                if df is not None:
+                    print(f"📦 CSV cargado desde caché: {full_path} ({len(df)} registros)")
+                    return df
             df = pd.read_csv(full_path, sep=sep, encoding=encoding, **kwargs)
+            if self.cache is not None:
+                self.cache.put(key, df)
             print(f"✅ CSV cargado exitosamente: {full_path} ({len(df)} registros)")
             return df
         except Exception as e:
             print(f"❌ Error al cargar CSV {filename}: {e}")
             raise
 
+    @staticmethod
+    def _iter_chunks(full_path, chunksize, **kwargs):
+        """Generador que entrega el CSV por bloques y cierra el archivo al terminar"""
+        with pd.read_csv(full_path, chunksize=chunksize, **kwargs) as reader:
+            for chunk in reader:
+                yield chunk
+
     def save_csv(self, df, filename, index=False, sep=",", encoding="utf-8", **kwargs):
         """
         Guarda un DataFrame en archivo CSV
         Args:
-            df: DataFrame a guardar
+            df: DataFrame a guardar (o iterador de DataFrames, que se escribe bloque a bloque)
             filename: Nombre del archivo destino
             index: Si se incluye el índice
             sep: Separador de campos
             encoding: Codificación del archivo
             **kwargs: Argumentos adicionales para df.to_csv()
+        La compresión se deduce de la extensión del destino (.gz, .bz2, .xz, .zst, .zip).
         """
         try:
             full_path = self._get_full_path(filename)
+            if is_chunk_stream(df):
+                total = 0
+                for i, chunk in enumerate(df):
+                    chunk.to_csv(full_path, index=index, sep=sep, encoding=encoding,
+                                 mode="w" if i == 0 else "a", header=(i == 0), **kwargs)
+                    total += len(chunk)
+                print(f"💾 CSV guardado exitosamente por bloques: {full_path} ({total} registros)")
+                return
             df.to_csv(full_path, index=index, sep=sep, encoding=encoding, **kwargs)
             print(f"💾 CSV guardado exitosamente: {full_path} ({len(df)} registros)")
         except Exception as e:
             print(f"❌ Error al guardar CSV {filename}: {e}")
             raise
 
-    def merge_csvs(self, file_pattern, output_filename, how="outer", **kwargs):
+    def merge_csvs(self, file_pattern, output_filename, how="outer", parallel=False, max_workers=None,
+                   read_kwargs=None, **kwargs):
         """
         Combina múltiples archivos CSV en uno solo
         Args:
             file_pattern: Patrón para encontrar archivos (ej: "data_*.csv")
             output_filename: Nombre del archivo combinado
             how: Tipo de merge (outer, inner, left, right)
-            **kwargs: Argumentos adicionales para pd.concat()
+            parallel: Si True, lee los archivos en un pool de procesos (en Windows el script
+                      que lo llama debe estar protegido con if __name__ == "__main__")
+            max_workers: Número de procesos del pool (por defecto, núcleos disponibles)
+            read_kwargs: Argumentos para pd.read_csv() de cada archivo (sep, encoding, dtype...)
+            **kwargs: Argumentos de pd.concat() para unir las columnas: 'join' ("outer" o
+                      "inner") y 'sort' (ordenar las columnas si los archivos no coinciden).
+                      Las columnas se ensamblan directamente, sin pd.concat; cualquier otro
+                      argumento produce TypeError
+        Los esquemas se unifican: las columnas faltantes se rellenan con nulos y los tipos en
+        conflicto se llevan a un tipo común. El resultado se ensambla columna a columna liberando
+        cada archivo a medida que se copia, sin mantener una segunda copia completa en memoria.
+        El tiempo de lectura de cada archivo queda en self.last_merge_timings.
         """
         try:
             if not self.base_path:
                 raise ValueError("Se requiere base_path para merge_csvs")
+            unexpected = [k for k in kwargs if k not in self.MERGE_CONCAT_KWARGS]
+            if unexpected:
+                raise TypeError(f"Argumentos de pd.concat no soportados en merge_csvs: {unexpected}")
+            join = kwargs.get("join", "outer")
+            if join not in ("outer", "inner"):
+                raise ValueError("join debe ser 'outer' o 'inner'")
                 
-            all_files = [f for f in os.listdir(self.base_path) if f.endswith('.csv') and f.startswith(file_pattern)]
+            all_files = sorted(f for f in os.listdir(self.base_path)
+                               if strip_codec_extension(f).endswith('.csv') and f.startswith(file_pattern))
             if not all_files:
                 raise FileNotFoundError(f"No se encontraron archivos con patrón: {file_pattern}")
+
+            read_kwargs = with_dtype_backend({"sep": ",", "encoding": "utf-8", **(read_kwargs or {})})
+            paths = [self._get_full_path(f) for f in all_files]
             
-            dfs = [self.load_csv(f) for f in all_files]
-            merged_df = pd.concat(dfs, axis=0, ignore_index=True, **kwargs)
+            if parallel:
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    results = list(executor.map(_read_csv_columns, paths, repeat(read_kwargs)))
+            else:
+                results = [_read_csv_columns(path, read_kwargs) for path in paths]
+
+            self.last_merge_timings = {}
+            for f, (_, nrows, seconds) in zip(all_files, results):
+                self.last_merge_timings[f] = seconds
+                print(f"⏱️ {f}: {seconds:.3f} s ({nrows} registros)")
+
+            parts = [(columns, nrows) for columns, nrows, _ in results]
+            del results
+            merged_df = self._assemble_parts(parts, join=join, sort=kwargs.get("sort", False))
             self.save_csv(merged_df, output_filename)
             print(f"🔀 Merge completado: {len(all_files)} archivos → {output_filename}")
             return merged_df
@@ -82,23 +184,226 @@ class CSV_Loader:
             print(f"❌ Error al fusionar CSVs: {e}")
             raise
 
-    def validate_csv(self, filename, required_columns=None):
+    @staticmethod
+    def _common_dtype(dtypes, has_missing):
+        """Determina el tipo común para una columna presente con 'dtypes' en los archivos"""
+        first = dtypes[0]
+        if not all(isinstance(dt, np.dtype) for dt in dtypes):
+            # Tipos de pandas (str, category, Int64...): solo se conservan si coinciden
+            return first if all(dt == first for dt in dtypes) else np.dtype(object)
+        kinds = {dt.kind for dt in dtypes}
+        if kinds <= {"i", "u", "f"}:
+            common = np.result_type(*dtypes)
+            if has_missing and common.kind in "iu":
+                common = np.dtype("float64")
+            return common
+        if kinds == {"M"}:
+            return np.result_type(*dtypes)
+        if kinds == {"b"} and not has_missing:
+            return first
+        if all(dt == first for dt in dtypes) and first.kind == "O":
+            return first
+        return np.dtype(object)
+
+    @staticmethod
+    def _assemble_parts(parts, join="outer", sort=False):
+        """
+        Ensambla las columnas de cada archivo en un único DataFrame.
+        'join' y 'sort' tienen el mismo significado que en pd.concat: con "inner" solo se
+        conservan las columnas presentes en todos los archivos, y con sort=True las columnas
+        se ordenan si los archivos no tienen las mismas columnas en el mismo orden.
+        Cada columna del resultado se reserva una sola vez y las columnas de origen se
+        liberan tan pronto se copian, por lo que el pico de memoria es el resultado más
+        una columna, en lugar de dos copias completas como con pd.concat.
+        """
+        columns = []
+        for part, _ in parts:
+            columns.extend(col for col in part if col not in columns)
+        if join == "inner":
+            columns = [col for col in columns if all(col in part for part, _ in parts)]
+        if sort and any(list(part) != list(parts[0][0]) for part, _ in parts):
+            columns = sorted(columns)
+        total = sum(nrows for _, nrows in parts)
+
+        data = {}
+        for col in columns:
+            present = [part[col].dtype for part, _ in parts if col in part]
+            dtype = CSV_Loader._common_dtype(present, len(present) < len(parts))
+
+            if isinstance(dtype, np.dtype):
+                fill = np.datetime64("NaT") if dtype.kind == "M" else np.nan
+                out = np.empty(total, dtype=dtype)
+                pos = 0
+                for part, nrows in parts:
+                    if col in part:
+                        values = pd.Series(part.pop(col))
+                        if values.hasnans and dtype.kind in "fMO":
+                            out[pos:pos + nrows] = values.to_numpy(dtype=dtype, na_value=fill)
+                        else:
+                            out[pos:pos + nrows] = values.to_numpy(dtype=dtype)
+                    else:
+                        out[pos:pos + nrows] = fill
+                    pos += nrows
+                data[col] = out
+            else:
+                pieces = [
+                    pd.Series(part.pop(col)) if col in part
+                    else pd.Series(pd.array([None] * nrows, dtype=dtype))
+                    for part, nrows in parts
+                ]
+                data[col] = pd.concat(pieces, ignore_index=True)
+
+        return pd.DataFrame(data, copy=False)
+
+    def validate_csv(self, filename, required_columns=None, max_null_rate=None, column_types=None,
+                     value_ranges=None, count_rows=False, chunksize=100000, max_bad_rows=10,
+                     sep=",", encoding="utf-8"):
         """
-        Valida la estructura básica de un archivo CSV
+        Valida la estructura básica de un archivo CSV sin cargarlo completo en memoria
         Args:
             filename: Nombre del archivo a validar
-            required_columns: Lista de columnas requeridas
+            required_columns: Lista de columnas requeridas (solo se lee el encabezado)
+            max_null_rate: Diccionario {columna: proporción máxima de nulos (0-1)}
+            column_types: Diccionario {columna: tipo}; tipos: 'int', 'float', 'numeric',
+                          'datetime', 'bool' o 'str'
+            value_ranges: Diccionario {columna: (mínimo, máximo)}; None deja el extremo abierto.
+                          Si los límites son fechas (o textos de fecha) la columna se compara
+                          como fecha aunque no esté en column_types
+            count_rows: Si True, cuenta los registros aunque no haya validaciones por fila
+            chunksize: Tamaño de bloque para las validaciones por fila
+            max_bad_rows: Máximo de filas inválidas que se guardan como muestra
+            sep: Separador de campos
+            encoding: Codificación del archivo
         Returns:
-            Tuple (bool, str) con resultado y mensaje
+            Tuple (bool, str) con resultado y mensaje. El detalle (conteos por regla, tasas de
+            nulos y muestra de filas inválidas) queda en self.last_validation
         """
+        max_null_rate = max_null_rate or {}
+        column_types = column_types or {}
+        value_ranges = value_ranges or {}
+        self.last_validation = None
         try:
-            df = self.load_csv(filename)
-            
+            full_path = self._get_full_path(filename)
+            read_kwargs = with_compression(full_path, {"sep": sep, "encoding": encoding})
+            columns = list(pd.read_csv(full_path, nrows=0, **read_kwargs).columns)
+            report = {"filename": filename, "columns": columns, "rows": None,
+                      "violations": {}, "null_rates": {}, "bad_rows": pd.DataFrame()}
+            self.last_validation = report
+
             if required_columns:
-                missing = [col for col in required_columns if col not in df.columns]
+                missing = [col for col in required_columns if col not in columns]
                 if missing:
                     return (False, f"Columnas faltantes: {missing}")
-                    
-            return (True, f"CSV válido: {filename} ({len(df)} registros, {len(df.columns)} columnas)")
+
+            checked = list(dict.fromkeys([*max_null_rate, *column_types, *value_ranges]))
+            missing = [col for col in checked if col not in columns]
+            if missing:
+                return (False, f"Columnas a validar no encontradas: {missing}")
+
+            if not checked and not count_rows:
+                return (True, f"CSV válido: {filename} ({len(columns)} columnas)")
+
+            usecols = checked or columns[:1]
+            rows = 0
+            nulls = dict.fromkeys(max_null_rate, 0)
+            bad_samples = []
+            bad_count = 0
+            with pd.read_csv(full_path, usecols=usecols, dtype=str, chunksize=chunksize,
+                             **read_kwargs) as reader:
+                for chunk in reader:
+                    chunk.index = pd.RangeIndex(rows + 1, rows + 1 + len(chunk), name="_fila")
+                    rows += len(chunk)
+                    for col in nulls:
+                        nulls[col] += int(chunk[col].isna().sum())
+
+                    errors = pd.Series("", index=chunk.index)
+                    for rule, col, mask in self._row_violations(chunk, column_types, value_ranges):
+                        count = int(mask.sum())
+                        if count:
+                            report["violations"][f"{rule}:{col}"] = report["violations"].get(f"{rule}:{col}", 0) + count
+                            errors[mask] += f"{rule}:{col} "
+
+                    bad = errors != ""
+                    bad_count += int(bad.sum())
+                    if bad.any() and sum(len(b) for b in bad_samples) < max_bad_rows:
+                        sample = chunk[bad].assign(_error=errors[bad].str.strip())
+                        bad_samples.append(sample.head(max_bad_rows - sum(len(b) for b in bad_samples)))
+
+            report["rows"] = rows
+            for col, limit in max_null_rate.items():
+                rate = nulls[col] / rows if rows else 0.0
+                report["null_rates"][col] = rate
+                if rate > limit:
+                    report["violations"][f"nulos:{col}"] = nulls[col]
+            if bad_samples:
+                report["bad_rows"] = pd.concat(bad_samples).reset_index()
+
+            if report["violations"]:
+                detail = ", ".join(f"{rule}={count}" for rule, count in report["violations"].items())
+                return (False, f"CSV inválido: {filename} ({rows} registros, {bad_count} filas inválidas; {detail})")
+            return (True, f"CSV válido: {filename} ({rows} registros, {len(columns)} columnas)")
         except Exception as e:
-            return (False, f"Error de validación: {str(e)}")
\ No newline at end of file
+            return (False, f"Error de validación: {str(e)}")
+
+    @staticmethod
+    def _is_date_bound(bound):
+        """Indica si un límite de value_ranges es una fecha o un texto que se lee como fecha"""
+        if isinstance(bound, (datetime.date, np.datetime64)):
+            return True
+        if isinstance(bound, str):
+            # Los textos numéricos ("10", "2.5") son límites numéricos, no fechas
+            if pd.notna(pd.to_numeric(bound, errors="coerce")):
+                return False
+            return pd.notna(pd.to_datetime(bound, errors="coerce", format="mixed"))
+        return False
+
+    @staticmethod
+    def _row_violations(chunk, column_types, value_ranges):
+        """
+        Genera (regla, columna, máscara) con las filas del bloque que no cumplen cada regla.
+        Las comprobaciones son vectorizadas sobre los valores leídos como texto; los nulos no
+        se consideran errores de tipo ni de rango.
+        """
+        converted = {}
+        for col, col_type in column_types.items():
+            values = chunk[col]
+            present = values.notna()
+            if col_type in ("int", "float", "numeric"):
+                numbers = pd.to_numeric(values, errors="coerce")
+                mask = present & numbers.isna()
+                if col_type == "int":
+                    mask |= numbers.notna() & (numbers % 1 != 0)
+                converted[col] = numbers
+            elif col_type == "datetime":
+                dates = pd.to_datetime(values, errors="coerce", format="mixed")
+                mask = present & dates.isna()
+                converted[col] = dates
+            elif col_type == "bool":
+                mask = present & ~values.str.strip().str.lower().isin(["true", "false", "1", "0"])
+            elif col_type == "str":
+                continue
+            else:
+                raise ValueError(f"Tipo de validación no soportado: {col_type}")
+            yield "tipo", col, mask
+
+        for col, (minv, maxv) in value_ranges.items():
+            values = converted.get(col)
+            if values is None:
+                # Sin tipo declarado, los límites indican cómo comparar: fechas (o textos de
+                # fecha) con pd.to_datetime y el resto como números
+                if any(CSV_Loader._is_date_bound(bound) for bound in (minv, maxv)):
+                    values = pd.to_datetime(chunk[col], errors="coerce", format="mixed")
+                else:
+                    values = pd.to_numeric(chunk[col], errors="coerce")
+            if pd.api.types.is_datetime64_any_dtype(values):
+                minv = pd.Timestamp(minv) if minv is not None else None
+                maxv = pd.Timestamp(maxv) if maxv is not None else None
+            else:
+                minv = pd.to_numeric(minv) if isinstance(minv, str) else minv
+                maxv = pd.to_numeric(maxv) if isinstance(maxv, str) else maxv
+            mask = pd.Series(False, index=chunk.index)
+            if minv is not None:
+                mask |= values < minv
+            if maxv is not None:
+                mask |= values > maxv
+            yield "rango", col, mask
@@ -1,26 +1,58 @@
 import pandas as pd
+from etl.engines import get_engine
+from etl.streaming import is_chunk_stream
 
 class DB_Loader:
     def __init__(self, engine=None):
-        self.engine = engine
+        """
+        Args:
+            engine: Engine de SQLAlchemy o DSN (str/URL). Con una DSN se usa el engine
+                    compartido de etl.engines, el mismo que usa DB_Extractor.connect()
+        """
+        self.engine = self._resolve(engine)
         if self.engine is None:
             print("⚠️ Advertencia: No se ha proporcionado un engine en el constructor. Deberás pasarlo a los métodos.")
 
+    @staticmethod
+    def _resolve(engine):
+        """Convierte una DSN en el engine compartido del registro"""
+        if engine is None or hasattr(engine, "connect"):
+            return engine
+        return get_engine(engine)
+
     def _get_engine(self, engine):
         if engine is not None:
-            return engine
+            return self._resolve(engine)
         elif self.engine is not None:
             return self.engine
         else:
             raise ValueError("❌ No se ha proporcionado un engine de base de datos.")
 
+    @staticmethod
+    def _to_sql(data, table_name, eng, if_exists, index, validate=None):
+        """
+        Escribe un DataFrame o un iterador de DataFrames en la tabla indicada.
+        Con un iterador, el primer bloque respeta 'if_exists' y los siguientes se añaden,
+        de modo que la carga usa memoria constante. 'validate' se aplica a cada bloque.
+        Retorna el número de registros escritos.
+        """
+        chunks = data if is_chunk_stream(data) else [data]
+        total = 0
+        for i, chunk in enumerate(chunks):
+            if validate is not None:
+                validate(chunk)
+            chunk.to_sql(name=table_name, con=eng, if_exists=if_exists if i == 0 else "append", index=index)
+            total += len(chunk)
+        return total
+
     def load_dimension(self, df, table_name, if_exists="replace", index=False, engine=None):
         """
         Carga una tabla de dimensión. Por defecto reemplaza la tabla completa.
+        'df' puede ser un DataFrame o un iterador de DataFrames (lectura por bloques).
         """
         try:
             eng = self._get_engine(engine)
-            df.to_sql(name=table_name, con=eng, if_exists=if_exists, index=index)
+            self._to_sql(df, table_name, eng, if_exists, index)
             print(f"✅ Dimensión '{table_name}' cargada exitosamente (modo: {if_exists}).")
         except Exception as e:
             print(f"❌ Error al cargar dimensión '{table_name}': {e}")
@@ -33,8 +65,8 @@ class DB_Loader:
         
         Parámetros:
         -----------
-        df : DataFrame
-            Datos a cargar
+        df : DataFrame o iterador de DataFrames
+            Datos a cargar. Con un iterador, las claves foráneas se validan bloque a bloque
         table_name : str
             Nombre de la tabla de hechos
         foreign_keys_map : dict
@@ -56,8 +88,10 @@ class DB_Loader:
         """
         try:
             eng = self._get_engine(engine)
-            
-            if foreign_keys_map:
+
+            def validate(df):
+                if not foreign_keys_map:
+                    return
                 # Verificar que las columnas del mapa existan en el DataFrame
                 missing_in_fact = [fk for fk in foreign_keys_map.keys() if fk not in df.columns] #Pone las llaves foraneas que no esten en el dataframme
                 if missing_in_fact:
@@ -83,7 +117,7 @@ class DB_Loader:
                                 )
             
             # Si todas las validaciones pasan, cargar los datos
-            df.to_sql(name=table_name, con=eng, if_exists=if_exists, index=index)
+            self._to_sql(df, table_name, eng, if_exists, index, validate=validate)
             print(f"✅ Hechos cargados exitosamente en la tabla '{table_name}' (modo: {if_exists}).")
             
 
@@ -106,11 +140,11 @@ class DB_Loader:
 
     def load_data(self, dataframe, table_name="Transformacion", if_exists="append", index=False, engine=None):
         """
-        Carga genérica de datos.
+        Carga genérica de datos (DataFrame o iterador de DataFrames).
         """
         try:
             eng = self._get_engine(engine)
-            dataframe.to_sql(name=table_name, con=eng, if_exists=if_exists, index=index)
+            self._to_sql(dataframe, table_name, eng, if_exists, index)
             print(f"✅ Datos cargados exitosamente en la tabla '{table_name}'.")
         except Exception as e:
             print(f"❌ Error al cargar datos: {e}")
@@ -1,28 +1,93 @@
+import os
+from contextlib import contextmanager
 import pandas as pd
+from etl.extractors.workbook_inspector import WorkbookInspector
+from etl.loaders.xlsx_package import SheetOperation, XLSXPackage
 
 class Excel_Loader:
     def __init__(self, default_path=None):
         self.default_path = default_path
+        self._session = None
     
     def _get_path(self, path):
         if path is not None:
             return path
+        elif self._session is not None:
+            # Dentro de una sesión, el libro de la sesión es la ruta por defecto
+            return self._session[0]
         elif self.default_path is not None:
             return self.default_path
         else:
             raise ValueError("❌ No se ha proporcionado una ruta para el archivo Excel.")
+
+    @contextmanager
+    def session(self, path=None):
+        """
+        Agrupa varias escrituras sobre el mismo libro en una sola reescritura.
+
+        Dentro del bloque, load_dimension, load_fact, load_data y clear_sheet no tocan el
+        archivo: las operaciones se encolan y al salir del bloque se aplican todas juntas
+        (el libro se abre y se guarda una sola vez, en un archivo temporal que reemplaza al
+        original). Las operaciones sin 'path' usan el libro de la sesión. Si ocurre un error
+        dentro del bloque no se escribe nada.
+
+        Ejemplo:
+            with loader.session("mart.xlsx"):
+                loader.load_dimension(dim_cliente, "dim_cliente")
+                loader.load_fact(extractor.read_csv(chunksize=50000), "hechos_ventas")
+        """
+        if self._session is not None:
+            raise ValueError("❌ Ya hay una sesión de Excel abierta en este loader.")
+        file_path = self._get_path(path)
+        self._session = (os.path.abspath(file_path), [])
+        try:
+            yield self
+            operations = self._session[1]
+            written = XLSXPackage(file_path).apply(operations)
+            print(f"💾 Libro guardado: {file_path} ({len(operations)} operaciones, "
+                  f"{sum(written.values())} registros)")
+        except Exception as e:
+            print(f"❌ Sesión de Excel cancelada, no se modificó {file_path}: {e}")
+            raise
+        finally:
+            self._session = None
+
+    def _submit(self, file_path, operation):
+        """
+        Aplica la operación sobre el libro o, si hay una sesión abierta, la encola.
+        Retorna el número de registros escritos (None si quedó en cola).
+        """
+        if self._session is None:
+            return sum(XLSXPackage(file_path).apply([operation]).values())
+        session_path, operations = self._session
+        if os.path.abspath(file_path) != session_path:
+            raise ValueError(f"❌ La sesión abierta es sobre {session_path}, no sobre {file_path}")
+        if operation.validate is not None and isinstance(operation.data, pd.DataFrame):
+            # Los DataFrames se validan al encolar; los iteradores, al guardar
+            operation.validate(operation.data)
+        operations.append(operation)
+        return None
+
+    def _load_sheet(self, file_path, data, sheet_name, if_exists, index, validate=None):
+        """
+        Escribe la hoja directamente en el contenedor .xlsx (XLSXPackage): "append" añade
+        filas al final de la hoja y cualquier otro valor la reemplaza. Las demás hojas no
+        se leen ni se vuelven a serializar. Retorna el número de registros escritos.
+        """
+        kind = "append" if if_exists == "append" else "replace"
+        return self._submit(file_path, SheetOperation(kind, sheet_name, data, index, validate))
     
     def load_dimension(self, df, sheet_name, path=None, if_exists="replace", index=False):
         """
         Carga una hoja de dimensión en un archivo Excel. Por defecto reemplaza el contenido.
+        'df' puede ser un DataFrame o un iterador de DataFrames.
+        Solo se reescribe la hoja afectada; las demás hojas del libro se conservan intactas.
         """
         try:
             file_path = self._get_path(path)
-            mode = 'a' if if_exists == "append" else 'w'
-            
-            with pd.ExcelWriter(file_path, engine='openpyxl', mode=mode) as writer:
-                df.to_excel(writer, sheet_name=sheet_name, index=index)
-            print(f"✅ Dimensión '{sheet_name}' cargada exitosamente en Excel (modo: {if_exists}).")
+            self._load_sheet(file_path, df, sheet_name, if_exists, index)
+            estado = "en cola (sesión)" if self._session is not None else "cargada exitosamente"
+            print(f"✅ Dimensión '{sheet_name}' {estado} en Excel (modo: {if_exists}).")
         except Exception as e:
             print(f"❌ Error al cargar dimensión '{sheet_name}' en Excel: {e}")
             raise
@@ -30,59 +95,47 @@ class Excel_Loader:
     def load_fact(self, df, sheet_name, path=None, foreign_keys=None, if_exists="append", index=False):
         """
         Carga una hoja de hechos en un archivo Excel con validación de claves foráneas.
+        'df' puede ser un DataFrame o un iterador de DataFrames (se valida bloque a bloque).
         """
         try:
             file_path = self._get_path(path)
             
-            if foreign_keys:
-                missing = [key for key in foreign_keys if key not in df.columns]
-                if missing:
-                    raise ValueError(f"🚫 Faltan columnas de clave foránea: {missing}")
-            
-            mode = 'a' if if_exists == "append" else 'w'
+            def validate(df):
+                if foreign_keys:
+                    missing = [key for key in foreign_keys if key not in df.columns]
+                    if missing:
+                        raise ValueError(f"🚫 Faltan columnas de clave foránea: {missing}")
             
-            with pd.ExcelWriter(file_path, engine='openpyxl', mode=mode) as writer:
-                df.to_excel(writer, sheet_name=sheet_name, index=index)
-            print(f"✅ Hechos cargados exitosamente en la hoja '{sheet_name}' (modo: {if_exists}).")
+            self._load_sheet(file_path, df, sheet_name, if_exists, index, validate=validate)
+            estado = "en cola (sesión)" if self._session is not None else "cargados exitosamente"
+            print(f"✅ Hechos {estado} en la hoja '{sheet_name}' (modo: {if_exists}).")
         except Exception as e:
             print(f"❌ Error al cargar hechos '{sheet_name}' en Excel: {e}")
             raise
     
     def clear_sheet(self, sheet_name, path=None):
         """
-        Limpia completamente una hoja del archivo Excel.
+        Limpia completamente una hoja del archivo Excel (la crea vacía si no existe).
+        Solo se reescribe el XML de esa hoja; el resto del libro se copia sin procesar.
         """
         try:
             file_path = self._get_path(path)
-            
-            # Leer el archivo completo
-            with pd.ExcelFile(file_path) as xls:
-                sheets = {sheet: pd.read_excel(xls, sheet_name=sheet) 
-                         for sheet in xls.sheet_names if sheet != sheet_name}
-            
-            # Reescribir el archivo excluyendo la hoja a limpiar
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                for sheet, data in sheets.items():
-                    data.to_excel(writer, sheet_name=sheet, index=False)
-                # Añadir hoja vacía
-                pd.DataFrame().to_excel(writer, sheet_name=sheet_name, index=False)
-            
-            print(f"🧹 Hoja '{sheet_name}' limpiada exitosamente.")
+            self._submit(file_path, SheetOperation("clear", sheet_name))
+            estado = "en cola (sesión)" if self._session is not None else "limpiada exitosamente"
+            print(f"🧹 Hoja '{sheet_name}' {estado}.")
         except Exception as e:
             print(f"❌ Error al limpiar la hoja '{sheet_name}': {e}")
             raise
     
     def load_data(self, dataframe, sheet_name="Transformacion", path=None, if_exists="append", index=False):
         """
-        Carga genérica de datos en una hoja Excel.
+        Carga genérica de datos en una hoja Excel (DataFrame o iterador de DataFrames).
         """
         try:
             file_path = self._get_path(path)
-            mode = 'a' if if_exists == "append" else 'w'
-            
-            with pd.ExcelWriter(file_path, engine='openpyxl', mode=mode) as writer:
-                dataframe.to_excel(writer, sheet_name=sheet_name, index=index)
-            print(f"✅ Datos cargados exitosamente en la hoja '{sheet_name}'.")
+            self._load_sheet(file_path, dataframe, sheet_name, if_exists, index)
+            estado = "en cola (sesión)" if self._session is not None else "cargados exitosamente"
+            print(f"✅ Datos {estado} en la hoja '{sheet_name}'.")
         except Exception as e:
             print(f"❌ Error al cargar datos en Excel: {e}")
             raise
@@ -90,9 +143,12 @@ class Excel_Loader:
     def get_sheet_names(self, path=None):
         """
         Obtiene la lista de hojas en el archivo Excel.
+        En libros .xlsx solo se lee el manifiesto del zip, sin cargar celdas.
         """
         try:
             file_path = self._get_path(path)
+            if WorkbookInspector.is_xlsx(file_path):
+                return WorkbookInspector(file_path).sheet_names()
             with pd.ExcelFile(file_path) as xls:
                 return xls.sheet_names
         except Exception as e:
@@ -0,0 +1,712 @@
+import copy
+import datetime
+import math
+import numbers
+import os
+import posixpath
+import re
+import shutil
+import struct
+import tempfile
+import uuid
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+import pandas as pd
+
+from etl.streaming import is_chunk_stream
+from etl.extractors.workbook_inspector import WorkbookInspector
+
+
+CONTENT_TYPES = "[Content_Types].xml"
+CALC_CHAIN = "xl/calcChain.xml"
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+WORKSHEET_REL = REL_NS + "/worksheet"
+WORKSHEET_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+ROW_TAG = re.compile(rb"<(?:\w+:)?row\b([^>]*)>")
+ROW_NUMBER = re.compile(rb'\br="(\d+)"')
+SHEET_DATA_END = re.compile(rb"<((?:\w+:)?)sheetData\s*/>|</((?:\w+:)?)sheetData>")
+DIMENSION = re.compile(rb'(<(?:\w+:)?dimension\b[^>]*\bref=")([^"]*)(")')
+
+# Partes que solo usa la hoja que las referencia: al reemplazarla quedarían huérfanas
+SHEET_OWNED_RELS = ("/table", "/comments", "/vmlDrawing", "/drawing", "/threadedComment")
+
+# La copia de entradas sin descomprimir usa detalles internos de zipfile; si cambian en
+# otra versión de Python se copia descomprimiendo y volviendo a comprimir
+_RAW_COPY_SUPPORTED = all(hasattr(zipfile, name) for name in (
+    "_FH_FILENAME_LENGTH", "_FH_EXTRA_FIELD_LENGTH", "structFileHeader", "sizeFileHeader",
+)) and hasattr(zipfile.ZipInfo, "FileHeader")
+
+# Operación sobre una hoja: kind es "replace", "append" o "clear"
+SheetOperation = namedtuple("SheetOperation", ["kind", "sheet_name", "data", "index", "validate", "header"],
+                            defaults=[None, False, None, True])
+
+
+def column_letter(number):
+    """Letra de columna de Excel para un número 1-based (1 -> A, 27 -> AA)"""
+    letters = ""
+    while number:
+        number, rest = divmod(number - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def _tag_blocks(stream, block_size=1024 * 1024):
+    """
+    Lee un XML en bloques que nunca cortan una etiqueta a la mitad, de modo que las
+    expresiones regulares sobre etiquetas se pueden aplicar bloque a bloque.
+    """
+    carry = b""
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            if carry:
+                yield carry
+            return
+        data = carry + block
+        cut = data.rfind(b"<")
+        if cut != -1 and data.find(b">", cut) == -1:
+            data, carry = data[:cut], data[cut:]
+        else:
+            carry = b""
+        if data:
+            yield data
+
+
+class _CellStyles:
+    """
+    Estilos de fecha en styles.xml. Los índices se calculan antes de escribir las celdas y
+    los formatos que faltan solo se agregan a styles.xml si alguna celda los usa.
+    """
+
+    # Formatos numéricos integrados de Excel
+    FORMATS = {"datetime": 22, "date": 14}
+
+    def __init__(self, xml):
+        self.xml = xml
+        self.index = {}
+        self.missing = []
+        self.used = set()
+        match = re.search(r"<((?:\w+:)?)cellXfs\b[^>]*>(.*?)</(?:\w+:)?cellXfs>", xml, re.S)
+        if match is None:
+            raise ValueError("styles.xml no contiene cellXfs")
+        self.prefix = match.group(1)
+        xfs = [dict(re.findall(r'(\w+)="([^"]*)"', attrs))
+               for attrs in re.findall(r"<(?:\w+:)?xf\b([^>]*)>", match.group(2))]
+        for kind, fmt in self.FORMATS.items():
+            found = next((i for i, xf in enumerate(xfs)
+                          if xf.get("numFmtId") == str(fmt)
+                          and all(xf.get(k, "0") == "0" for k in ("fontId", "fillId", "borderId"))), None)
+            if found is None:
+                found = len(xfs) + len(self.missing)
+                self.missing.append(fmt)
+            self.index[kind] = found
+        self.count = len(xfs)
+
+    def get(self, kind):
+        self.used.add(kind)
+        return self.index[kind]
+
+    def updated_xml(self):
+        """styles.xml con los formatos agregados, o None si no hace falta modificarlo"""
+        if not any(self.index[kind] >= self.count for kind in self.used):
+            return None
+        p = self.prefix
+        new = "".join(f'<{p}xf numFmtId="{fmt}" fontId="0" fillId="0" borderId="0" xfId="0" '
+                      f'applyNumberFormat="1"/>' for fmt in self.missing)
+        xml = re.sub(rf"</{re.escape(p)}cellXfs>", lambda m: new + m.group(0), self.xml, count=1)
+        return re.sub(r'(<(?:\w+:)?cellXfs\b[^>]*\bcount=")(\d+)(")',
+                      lambda m: f"{m.group(1)}{self.count + len(self.missing)}{m.group(3)}", xml, count=1)
+
+
+class _SheetWriter:
+    """Convierte DataFrames en filas XML (<row>) con cadenas en línea, sin sharedStrings"""
+
+    def __init__(self, styles, prefix=""):
+        self.styles = styles
+        self.prefix = prefix
+
+    def _text(self, ref, value):
+        text = escape(ILLEGAL_XML_CHARS.sub("", str(value)))
+        return f'<{self.prefix}c r="{ref}" t="inlineStr"><{self.prefix}is><{self.prefix}t xml:space="preserve">' \
+               f'{text}</{self.prefix}t></{self.prefix}is></{self.prefix}c>'
+
+    def _number(self, ref, value, style=None):
+        s = f' s="{style}"' if style is not None else ""
+        return f'<{self.prefix}c r="{ref}"{s}><{self.prefix}v>{value}</{self.prefix}v></{self.prefix}c>'
+
+    def _date(self, ref, value, kind):
+        if self.styles is None:
+            return self._text(ref, value.isoformat())
+        if kind == "date":
+            value = datetime.datetime.combine(value, datetime.time())
+        serial = (pd.Timestamp(value).tz_localize(None) - EXCEL_EPOCH) / pd.Timedelta(days=1)
+        return self._number(ref, repr(float(serial)), self.styles.get(kind))
+
+    def _value(self, ref, value):
+        """Celda para un valor de tipo arbitrario ('' si está vacío)"""
+        if value is None or value is pd.NA or value is pd.NaT:
+            return ""
+        if isinstance(value, (bool, np.bool_)):
+            return f'<{self.prefix}c r="{ref}" t="b"><{self.prefix}v>{int(value)}</{self.prefix}v></{self.prefix}c>'
+        if isinstance(value, numbers.Integral):
+            return self._number(ref, int(value))
+        if isinstance(value, numbers.Real):
+            value = float(value)
+            return self._number(ref, repr(value)) if math.isfinite(value) else ""
+        if isinstance(value, datetime.datetime):
+            return self._date(ref, value, "datetime")
+        if isinstance(value, datetime.date):
+            return self._date(ref, value, "date")
+        return self._text(ref, value)
+
+    def _column(self, series, letter, first_row):
+        """Celdas XML de una columna; usa caminos vectorizados para los tipos numpy comunes"""
+        rows = range(first_row, first_row + len(series))
+        if pd.api.types.is_datetime64_any_dtype(series):
+            if getattr(series.dt, "tz", None) is not None:
+                series = series.dt.tz_localize(None)
+            if self.styles is None:
+                return [self._text(f"{letter}{r}", v.isoformat()) if v is not pd.NaT else ""
+                        for r, v in zip(rows, series)]
+            serials = ((series - EXCEL_EPOCH) / pd.Timedelta(days=1)).tolist()
+            style = self.styles.get("datetime") if series.notna().any() else None
+            return [self._number(f"{letter}{r}", repr(v), style) if v == v else ""
+                    for r, v in zip(rows, serials)]
+        numpy_dtype = isinstance(series.dtype, np.dtype)
+        if numpy_dtype and series.dtype.kind == "f":
+            return [self._number(f"{letter}{r}", repr(v)) if math.isfinite(v) else ""
+                    for r, v in zip(rows, series.tolist())]
+        if numpy_dtype and series.dtype.kind in "iu":
+            return [self._number(f"{letter}{r}", v) for r, v in zip(rows, series.tolist())]
+        return [self._value(f"{letter}{r}", v) for r, v in zip(rows, series.tolist())]
+
+    def header(self, columns, row=1):
+        p = self.prefix
+        cells = "".join(self._text(f"{column_letter(j)}{row}", col) for j, col in enumerate(columns, 1))
+        return f'<{p}row r="{row}">{cells}</{p}row>'
+
+    def rows(self, df, first_row):
+        p = self.prefix
+        columns = [self._column(df.iloc[:, j], column_letter(j + 1), first_row) for j in range(df.shape[1])]
+        return "".join(f'<{p}row r="{first_row + i}">{"".join(cells)}</{p}row>'
+                       for i, cells in enumerate(zip(*columns)))
+
+
+class XLSXPackage:
+    """
+    Operaciones a nivel de hoja sobre un libro .xlsx que modifican solo la parte XML de la
+    hoja afectada dentro del contenedor zip.
+
+    Las demás entradas del zip (otras hojas, sharedStrings, imágenes...) se copian con sus
+    bytes comprimidos tal cual, sin descomprimirlas, por lo que el costo depende de la hoja
+    modificada y no del tamaño del libro. Las celdas nuevas se escriben como cadenas en
+    línea (no se toca sharedStrings) y las fechas con un estilo de fecha de styles.xml.
+    El libro se reescribe en un archivo temporal que reemplaza al original al terminar.
+
+    La escritura es en streaming: los datos (DataFrame o iterador de DataFrames) se
+    convierten a XML en lotes de 'batch_rows' filas que van a un archivo temporal en disco,
+    de modo que la memoria no depende del número total de filas.
+    """
+
+    def __init__(self, file_path, batch_rows=5000):
+        """
+        Args:
+            file_path: Ruta del libro .xlsx (se crea si no existe)
+            batch_rows: Filas convertidas a XML por lote
+        """
+        self.file_path = file_path
+        self.batch_rows = batch_rows
+
+    def replace_sheet(self, sheet_name, data, index=False, validate=None, header=True):
+        """
+        Reemplaza el contenido de la hoja (la crea si no existe) con encabezado y datos.
+        'data' puede ser un DataFrame o un iterador de DataFrames. Retorna los registros escritos.
+        """
+        written = self.apply([SheetOperation("replace", sheet_name, data, index, validate, header)])
+        return sum(written.values())
+
+    def append_rows(self, sheet_name, data, index=False, validate=None, header=True):
+        """
+        Añade filas al final de la hoja sin reescribir las existentes. Si la hoja no existe
+        o está vacía se escribe también el encabezado. Si ya tiene encabezado, las columnas
+        se reordenan según él (ValueError si no son las mismas); con header=False se escriben
+        por posición. Retorna los registros escritos.
+        """
+        written = self.apply([SheetOperation("append", sheet_name, data, index, validate, header)])
+        return sum(written.values())
+
+    def clear_sheet(self, sheet_name):
+        """Deja la hoja vacía (la crea si no existe)"""
+        self.apply([SheetOperation("clear", sheet_name)])
+
+    def apply(self, operations, overwrite=False):
+        """
+        Aplica una lista de SheetOperation con una sola reescritura del libro.
+        Con overwrite=True se parte de un libro vacío: el archivo queda solo con las hojas
+        de las operaciones.
+        Retorna {hoja: registros escritos} con el nombre de la hoja tal como está en el libro
+        (Excel no distingue mayúsculas en los nombres de hoja).
+        """
+        if not operations:
+            return {}
+        operations = [SheetOperation(*op) for op in operations]
+        source = self.file_path
+        created = None
+        if overwrite or not os.path.exists(source):
+            created = source = self._empty_workbook(operations[0].sheet_name)
+        tmp_path = f"{self.file_path}.{uuid.uuid4().hex}.tmp"
+        spools = []
+        try:
+            with zipfile.ZipFile(source) as archive:
+                written = self._rewrite(archive, operations, tmp_path, spools)
+            os.replace(tmp_path, self.file_path)
+            return written
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            for spool in spools:
+                spool.close()
+            if created is not None and os.path.exists(created):
+                os.remove(created)
+
+    def _empty_workbook(self, sheet_name):
+        """Libro nuevo con una hoja vacía, usado como base cuando el archivo no existe"""
+        from openpyxl import Workbook
+
+        path = f"{self.file_path}.{uuid.uuid4().hex}.new.xlsx"
+        wb = Workbook()
+        wb.active.title = sheet_name
+        wb.save(path)
+        return path
+
+    @staticmethod
+    def _validate_sheet_name(name):
+        if not name or len(name) > 31 or INVALID_SHEET_CHARS.search(name):
+            raise ValueError(f"Nombre de hoja inválido para Excel: '{name}'")
+
+    @staticmethod
+    def _plan(operations, existing):
+        """
+        Agrupa las operaciones por hoja. Por cada hoja queda la base (None = conservar el
+        contenido actual, o la última operación replace/clear) y las operaciones append
+        posteriores a esa base.
+        """
+        plans = {}
+        for op in operations:
+            kind, sheet_name = op.kind, op.sheet_name
+            if kind not in ("replace", "append", "clear"):
+                raise ValueError(f"Operación de hoja no soportada: {kind}")
+            name = existing.get(sheet_name.lower(), sheet_name)
+            plan = plans.setdefault(name, {"base": None, "appends": []})
+            if kind == "append":
+                plan["appends"].append(op)
+            else:
+                plan["base"] = op
+                plan["appends"] = []
+        return plans
+
+    @staticmethod
+    def _scan_sheet(archive, part):
+        """
+        Recorre el XML de una hoja sin construir el árbol y retorna (última fila, prefijo del
+        espacio de nombres, referencia de <dimension>).
+        """
+        last_row = 0
+        prefix = None
+        dimension = None
+        with archive.open(part) as stream:
+            for block in _tag_blocks(stream):
+                if dimension is None:
+                    match = DIMENSION.search(block)
+                    if match:
+                        dimension = match.group(2).decode()
+                for match in ROW_TAG.finditer(block):
+                    number = ROW_NUMBER.search(match.group(1))
+                    last_row = int(number.group(1)) if number else last_row + 1
+                end = SHEET_DATA_END.search(block)
+                if end:
+                    prefix = (end.group(1) or end.group(2) or b"").decode()
+        return last_row, prefix or "", dimension
+
+    @staticmethod
+    def _align(chunk, existing_header, sheet_name):
+        """
+        Ordena las columnas del bloque según el encabezado de la hoja, como al añadir filas a
+        un CSV. Si las columnas no son las mismas se lanza ValueError en lugar de escribir
+        valores bajo columnas equivocadas.
+        """
+        columns = [str(col) for col in chunk.columns]
+        if columns == existing_header:
+            return chunk
+        if sorted(columns) == sorted(existing_header):
+            # Mismas columnas en distinto orden: se reordenan según la hoja
+            return chunk[[chunk.columns[columns.index(col)] for col in existing_header]]
+        raise ValueError(
+            f"Las columnas {columns} no coinciden con el encabezado de la hoja '{sheet_name}': {existing_header}"
+        )
+
+    @staticmethod
+    def _shared_strings(archive, rels_xml, needed):
+        """Textos de sharedStrings.xml con los índices de 'needed' (se deja de leer al tenerlos)"""
+        match = re.search(r'<Relationship\b[^>]*Type="[^"]*/sharedStrings"[^>]*>', rels_xml)
+        if match is None or not needed:
+            return {}
+        target = re.search(r'Target="([^"]*)"', match.group(0)).group(1)
+        part = target.lstrip("/") if target.startswith("/") else "xl/" + target
+        if part not in archive.NameToInfo:
+            return {}
+        found = {}
+        last = max(needed)
+        with archive.open(part) as stream:
+            position = 0
+            for _, element in ET.iterparse(stream, events=("end",)):
+                if element.tag.rsplit("}", 1)[-1] != "si":
+                    continue
+                if position in needed:
+                    # Texto simple (<t>) o enriquecido (<r><t>); la guía fonética <rPh> no cuenta
+                    found[position] = "".join(
+                        t.text or "" for child in element
+                        for t in ([child] if child.tag.endswith("}t") else list(child) if child.tag.endswith("}r") else [])
+                        if t.tag.endswith("}t"))
+                element.clear()
+                if position >= last:
+                    break
+                position += 1
+        return found
+
+    def _read_header(self, archive, part, rels_xml):
+        """
+        Valores de la primera fila de la hoja como texto, en orden de columna (las celdas
+        vacías del final no cuentan). Solo se recorre el XML hasta el final de esa fila.
+        """
+        cells = {}
+        shared = {}
+        with archive.open(part) as stream:
+            for _, element in ET.iterparse(stream, events=("end",)):
+                name = element.tag.rsplit("}", 1)[-1]
+                if name == "c":
+                    ref = re.match(r"([A-Z]+)", (element.get("r") or "").upper())
+                    column = self._dimension_size(ref.group(1) + "1")[1] if ref else len(cells) + 1
+                    kind = element.get("t")
+                    if kind == "inlineStr":
+                        value = "".join(t.text or "" for t in element.iter() if t.tag.rsplit("}", 1)[-1] == "t")
+                    else:
+                        v = next((x.text for x in element if x.tag.rsplit("}", 1)[-1] == "v"), None)
+                        if v is None:
+                            continue
+                        if kind == "s":
+                            shared[column] = int(v)
+                            value = None
+                        elif kind == "n" or kind is None:
+                            number = float(v)
+                            value = str(int(number)) if number.is_integer() else v
+                        else:
+                            value = v
+                    cells[column] = value
+                elif name == "row":
+                    break
+        texts = self._shared_strings(archive, rels_xml, set(shared.values()))
+        for column, position in shared.items():
+            cells[column] = texts.get(position, "")
+        if not cells:
+            return None
+        return [cells.get(column) or "" for column in range(1, max(cells) + 1)]
+
+    def _render(self, writer, ops, spool, next_row, header, existing_header=None):
+        """
+        Escribe en 'spool' las filas XML de las operaciones a partir de 'next_row'.
+        'header' indica que la hoja todavía no tiene encabezado: se escribe con las columnas
+        del primer bloque si su operación lo pide. 'existing_header' son las columnas del
+        encabezado que ya tiene la hoja; los bloques de operaciones con header=True se
+        alinean con él (o con el que se escriba aquí).
+        Retorna (última fila, número de columnas, registros escritos).
+        """
+        max_columns = 0
+        rows = 0
+        for op in ops:
+            if op.data is None:
+                continue
+            chunks = op.data if is_chunk_stream(op.data) else [op.data]
+            for chunk in chunks:
+                if op.validate is not None:
+                    op.validate(chunk)
+                if op.index:
+                    chunk = chunk.reset_index()
+                if header:
+                    if op.header:
+                        existing_header = [str(c) for c in chunk.columns]
+                        spool.write(writer.header(existing_header, next_row).encode("utf-8"))
+                        next_row += 1
+                    header = False
+                elif op.header and existing_header is not None:
+                    chunk = self._align(chunk, existing_header, op.sheet_name)
+                max_columns = max(max_columns, chunk.shape[1])
+                for start in range(0, len(chunk), self.batch_rows):
+                    batch = chunk.iloc[start:start + self.batch_rows]
+                    spool.write(writer.rows(batch, next_row).encode("utf-8"))
+                    next_row += len(batch)
+                    rows += len(batch)
+        return next_row - 1, max_columns, rows
+
+    def _rewrite(self, archive, operations, tmp_path, spools):
+        sheets = WorkbookInspector.sheet_parts(archive)
+        parts = {name: part for name, _, part in sheets}
+        existing = {name.lower(): name for name in parts}
+        plans = self._plan(operations, existing)
+
+        rels_part = WorkbookInspector.WORKBOOK_RELS
+        workbook_xml = archive.read(WorkbookInspector.WORKBOOK).decode("utf-8")
+        rels_xml = archive.read(rels_part).decode("utf-8")
+        types_xml = archive.read(CONTENT_TYPES).decode("utf-8")
+
+        styles_part = None
+        match = re.search(r'<Relationship\b[^>]*Type="[^"]*/styles"[^>]*>', rels_xml)
+        if match:
+            target = re.search(r'Target="([^"]*)"', match.group(0)).group(1)
+            styles_part = target.lstrip("/") if target.startswith("/") else "xl/" + target
+        styles = None
+        if styles_part in archive.NameToInfo:
+            try:
+                styles = _CellStyles(archive.read(styles_part).decode("utf-8"))
+            except ValueError:
+                styles = None
+
+        modified = {}     # parte -> (tipo, spool, prefijo, dimensión nueva)
+        dropped = set()   # partes de las hojas reemplazadas que ya no se referencian
+        written = {}
+        drop_calc_chain = False
+        for name, plan in plans.items():
+            part = parts.get(name)
+            base = plan["base"]
+            spool = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+            spools.append(spool)
+            if part is not None and base is None:
+                # Append sobre una hoja existente: se conserva su XML y se insertan filas
+                last_row, prefix, dimension = self._scan_sheet(archive, part)
+                writer = _SheetWriter(styles, prefix)
+                existing_header = self._read_header(archive, part, rels_xml) if last_row else None
+                end_row, columns, rows = self._render(writer, plan["appends"], spool, last_row + 1,
+                                                      header=last_row == 0, existing_header=existing_header)
+                first = re.match(r"\$?([A-Z]+)\$?(\d+)", (dimension or "A1").upper())
+                first_col, first_row = (first.group(1), first.group(2)) if first else ("A", "1")
+                _, old_columns = self._dimension_size(dimension)
+                ref = f"{first_col}{first_row}:{column_letter(max(columns, old_columns, 1))}{max(end_row, 1)}"
+                modified[part] = ("append", spool, prefix, ref)
+            else:
+                self._validate_sheet_name(name)
+                writer = _SheetWriter(styles)
+                ops = ([base] if base is not None else []) + plan["appends"]
+                end_row, columns, rows = self._render(writer, ops, spool, 1, header=True)
+                ref = f"A1:{column_letter(columns)}{end_row}" if end_row else "A1"
+                if part is None:
+                    part, workbook_xml, rels_xml, types_xml = self._add_sheet(
+                        name, archive, workbook_xml, rels_xml, types_xml, modified)
+                else:
+                    # Las fórmulas de la hoja reemplazada desaparecen: Excel reconstruye calcChain
+                    drop_calc_chain = True
+                    # El XML nuevo no referencia tablas, dibujos ni comentarios de la hoja anterior
+                    dropped |= self._sheet_owned_parts(archive, part)
+                modified[part] = ("new", spool, "", ref)
+            written[name] = rows
+
+        if drop_calc_chain and CALC_CHAIN in archive.NameToInfo:
+            rels_xml = re.sub(r'<Relationship\b[^>]*Target="/?(?:xl/)?calcChain\.xml"[^>]*/>', "", rels_xml)
+            types_xml = re.sub(r'<Override\b[^>]*PartName="/xl/calcChain\.xml"[^>]*/>', "", types_xml)
+        for name in dropped:
+            types_xml = re.sub(rf'<Override\b[^>]*PartName="/{re.escape(name)}"[^>]*/>', "", types_xml)
+        text_parts = {
+            WorkbookInspector.WORKBOOK: workbook_xml,
+            rels_part: rels_xml,
+            CONTENT_TYPES: types_xml,
+        }
+        styles_xml = styles.updated_xml() if styles is not None else None
+        if styles_xml is not None:
+            text_parts[styles_part] = styles_xml
+
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as out, open(archive.filename, "rb") as raw:
+            for info in archive.infolist():
+                if (info.filename == CALC_CHAIN and drop_calc_chain) or info.filename in dropped:
+                    continue
+                if info.filename in modified:
+                    self._write_sheet_part(archive, out, info.filename, modified.pop(info.filename))
+                elif info.filename in text_parts:
+                    out.writestr(self._new_info(info.filename, info), text_parts[info.filename].encode("utf-8"))
+                elif _RAW_COPY_SUPPORTED and hasattr(out, "start_dir"):
+                    self._copy_raw(raw, info, out)
+                else:
+                    self._copy_streamed(archive, info, out)
+            # Hojas nuevas
+            for part, change in modified.items():
+                self._write_sheet_part(archive, out, part, change)
+        return written
+
+    @staticmethod
+    def _sheet_owned_parts(archive, part):
+        """
+        Relaciones de la hoja (xl/worksheets/_rels/sheetN.xml.rels) y las partes que solo
+        ella usa (tablas, comentarios, dibujos), incluidas las relaciones de esas partes.
+        """
+        rels = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+        if rels not in archive.NameToInfo:
+            return set()
+        owned = {rels}
+        rels_xml = archive.read(rels).decode("utf-8")
+        for relation in re.findall(r"<Relationship\b[^>]*>", rels_xml):
+            kind = re.search(r'Type="([^"]*)"', relation)
+            target = re.search(r'Target="([^"]*)"', relation)
+            if not (kind and target) or 'TargetMode="External"' in relation:
+                continue
+            if not kind.group(1).endswith(SHEET_OWNED_RELS):
+                continue
+            path = target.group(1)
+            name = path.lstrip("/") if path.startswith("/") else posixpath.normpath(
+                posixpath.join(posixpath.dirname(part), path))
+            owned.add(name)
+            owned.add(posixpath.join(posixpath.dirname(name), "_rels", posixpath.basename(name) + ".rels"))
+        return owned & set(archive.NameToInfo)
+
+    @staticmethod
+    def _dimension_size(ref):
+        cells = re.findall(r"\$?([A-Z]+)\$?(\d+)", (ref or "").upper())
+        if not cells:
+            return 0, 0
+        last_col = cells[-1][0]
+        number = 0
+        for char in last_col:
+            number = number * 26 + ord(char) - 64
+        return int(cells[-1][1]), number
+
+    @staticmethod
+    def _add_sheet(name, archive, workbook_xml, rels_xml, types_xml, modified):
+        """Registra una hoja nueva en workbook.xml, sus relaciones y [Content_Types].xml"""
+        taken = set(archive.NameToInfo) | set(modified)
+        number = 1
+        while f"xl/worksheets/sheet{number}.xml" in taken:
+            number += 1
+        part = f"xl/worksheets/sheet{number}.xml"
+
+        ids = {int(i) for i in re.findall(r'Id="rId(\d+)"', rels_xml)}
+        rel_id = f"rId{max(ids, default=0) + 1}"
+        sheet_ids = [int(i) for i in re.findall(r'\bsheetId="(\d+)"', workbook_xml)]
+        sheet_id = max(sheet_ids, default=0) + 1
+
+        ns = re.search(rf'xmlns:(\w+)="{re.escape(REL_NS)}"', workbook_xml)
+        r_prefix = ns.group(1) if ns else "r"
+        sheets_end = re.search(r"</((?:\w+:)?)sheets>", workbook_xml)
+        p = sheets_end.group(1)
+        declare = "" if ns else f' xmlns:r="{REL_NS}"'
+        element = f'<{p}sheet name={quoteattr(name)} sheetId="{sheet_id}" {r_prefix}:id="{rel_id}"{declare}/>'
+        workbook_xml = workbook_xml[:sheets_end.start()] + element + workbook_xml[sheets_end.start():]
+
+        relation = f'<Relationship Id="{rel_id}" Type="{WORKSHEET_REL}" Target="worksheets/sheet{number}.xml"/>'
+        rels_xml = rels_xml.replace("</Relationships>", relation + "</Relationships>", 1)
+        override = f'<Override PartName="/{part}" ContentType="{WORKSHEET_CONTENT_TYPE}"/>'
+        types_xml = types_xml.replace("</Types>", override + "</Types>", 1)
+        return part, workbook_xml, rels_xml, types_xml
+
+    @staticmethod
+    def _new_info(name, template=None):
+        info = zipfile.ZipInfo(name, date_time=template.date_time if template else
+                               datetime.datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        if template is not None:
+            info.external_attr = template.external_attr
+        return info
+
+    def _write_sheet_part(self, archive, out, part, change):
+        """Escribe la hoja modificada: XML nuevo o el XML original con las filas insertadas"""
+        kind, spool, prefix, ref = change
+        template = archive.NameToInfo.get(part)
+        # Tamaño final: las filas nuevas más el XML que se conserva (con margen para las
+        # etiquetas); zipfile exige decidir ZIP64 antes de escribir la entrada
+        expected = spool.seek(0, os.SEEK_END) + 64 * 1024
+        if kind == "append" and template is not None:
+            expected += template.file_size
+        big = expected >= zipfile.ZIP64_LIMIT
+        spool.seek(0)
+        with out.open(self._new_info(part, template), "w", force_zip64=big) as dst:
+            if kind == "new":
+                dst.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                          + f'<worksheet xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+                            f'<dimension ref="{ref}"/>'.encode())
+                if spool.read(1):
+                    spool.seek(0)
+                    dst.write(b"<sheetData>")
+                    shutil.copyfileobj(spool, dst)
+                    dst.write(b"</sheetData>")
+                else:
+                    dst.write(b"<sheetData/>")
+                dst.write(b"</worksheet>")
+                return
+            inserted = False
+            dimension_done = False
+            with archive.open(part) as src:
+                for block in _tag_blocks(src):
+                    if not inserted:
+                        if not dimension_done:
+                            block, n = DIMENSION.subn(lambda m: m.group(1) + ref.encode() + m.group(3), block, count=1)
+                            dimension_done = n > 0
+                        end = SHEET_DATA_END.search(block)
+                        if end:
+                            dst.write(block[:end.start()])
+                            if end.group(1) is not None:
+                                # <sheetData/>: hoja sin filas
+                                dst.write(f"<{prefix}sheetData>".encode())
+                                shutil.copyfileobj(spool, dst)
+                                dst.write(f"</{prefix}sheetData>".encode())
+                            else:
+                                shutil.copyfileobj(spool, dst)
+                                dst.write(end.group(0))
+                            dst.write(block[end.end():])
+                            inserted = True
+                            continue
+                    dst.write(block)
+            if not inserted:
+                raise ValueError(f"No se encontró <sheetData> en la hoja {part}")
+
+    def _copy_streamed(self, archive, info, out):
+        """Copia una entrada descomprimiéndola y volviéndola a comprimir (solo API pública)"""
+        new = self._new_info(info.filename, info)
+        new.compress_type = info.compress_type
+        with archive.open(info) as src, out.open(new, "w", force_zip64=info.file_size >= zipfile.ZIP64_LIMIT) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    @staticmethod
+    def _copy_raw(raw, info, out):
+        """
+        Copia una entrada del zip con sus bytes comprimidos, sin descomprimirla.
+        zipfile no ofrece una API pública para esto, así que se replica lo que hace
+        ZipFile.write: cabecera local + datos y registro en la lista del directorio central.
+        """
+        raw.seek(info.header_offset)
+        header = struct.unpack(zipfile.structFileHeader, raw.read(zipfile.sizeFileHeader))
+        raw.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR)
+
+        new = copy.copy(info)
+        new.header_offset = out.fp.tell()
+        # Los tamaños y el CRC van en la cabecera local, no en un descriptor posterior
+        new.flag_bits &= ~0x08
+        out.fp.write(new.FileHeader())
+        remaining = info.compress_size
+        while remaining > 0:
+            block = raw.read(min(remaining, 1024 * 1024))
+            if not block:
+                raise ValueError(f"Entrada del zip truncada: {info.filename}")
+            out.fp.write(block)
+            remaining -= len(block)
+        out.filelist.append(new)
+        out.NameToInfo[new.filename] = new
+        out.start_dir = out.fp.tell()
+        out._didModify = True
@@ -0,0 +1,65 @@
+import json
+import os
+import uuid
+
+
+class StateStore:
+    """
+    Estado persistente entre ejecuciones del pipeline (checkpoints, marcas de agua...).
+
+    Se guarda como un único archivo JSON {clave: valor}. Cada escritura se hace en un
+    archivo temporal que luego reemplaza al original, de modo que una ejecución
+    interrumpida nunca deja el estado a medio escribir.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Ruta del archivo JSON de estado (se crea en la primera escritura)
+        """
+        self.path = path
+
+    @classmethod
+    def resolve(cls, state):
+        """Acepta un StateStore o la ruta de su archivo JSON"""
+        if isinstance(state, cls):
+            return state
+        return cls(state)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, key, default=None):
+        """Retorna el valor guardado con 'key' o 'default' si no existe"""
+        return self._load().get(key, default)
+
+    def set(self, key, value):
+        """Guarda 'value' con 'key' (debe ser serializable a JSON)"""
+        data = self._load()
+        data[key] = value
+        self._save(data)
+
+    def delete(self, key):
+        """Elimina la clave si existe"""
+        data = self._load()
+        if data.pop(key, None) is not None:
+            self._save(data)
+
+    def keys(self):
+        return list(self._load().keys())
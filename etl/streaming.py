@@ -0,0 +1,86 @@
+from collections.abc import Iterator
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+
+def is_chunk_stream(data):
+    """
+    Indica si 'data' es un flujo de bloques (iterador de DataFrames) en lugar de un DataFrame.
+
+    Los extractores devuelven este tipo de objeto cuando se leen con 'chunksize'.
+    """
+    return not isinstance(data, pd.DataFrame) and isinstance(data, Iterator)
+
+
+def chunk_support(func):
+    """
+    Decorador para operaciones fila a fila que también deben aceptar flujos de bloques.
+
+    Si el primer argumento es un DataFrame, la función se ejecuta igual que siempre.
+    Si es un iterador de DataFrames, se devuelve un generador que aplica la función a cada
+    bloque a medida que se consume, de modo que la memoria usada depende del tamaño del bloque.
+    """
+    @wraps(func)
+    def wrapper(df, *args, **kwargs):
+        if is_chunk_stream(df):
+            return (func(chunk, *args, **kwargs) for chunk in df)
+        return func(df, *args, **kwargs)
+
+    return wrapper
+
+
+def concat_chunks(data):
+    """
+    Materializa un flujo de bloques en un único DataFrame (o devuelve el DataFrame tal cual).
+
+    Útil antes de operaciones que necesitan todos los datos a la vez (agrupaciones, ordenamientos).
+    """
+    if not is_chunk_stream(data):
+        return data
+    chunks = list(data)
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+
+def reservoir_sample(chunks, n, random_state=None):
+    """
+    Muestra aleatoria uniforme de 'n' filas sobre un flujo de bloques (reservoir sampling).
+
+    Recorre los bloques una sola vez y mantiene como máximo 'n' filas en memoria, sin importar
+    el tamaño total. Las filas se devuelven en el orden en que aparecen en la fuente.
+    """
+    rng = np.random.default_rng(random_state)
+    reservoir = None
+    seen = 0
+    for chunk in chunks:
+        m = len(chunk)
+        chunk = chunk.set_axis(pd.RangeIndex(seen, seen + m))
+        if reservoir is None:
+            reservoir = chunk.iloc[:0]
+
+        # Fase de llenado: las primeras n filas entran directamente
+        fill = min(n - len(reservoir), m)
+        if fill > 0:
+            reservoir = pd.concat([reservoir, chunk.iloc[:fill]])
+
+        # Fase de reemplazo: la fila global i ocupa la posición j ~ U[0, i] si j < n
+        if fill < m and n > 0:
+            rows = np.arange(fill, m)
+            slots = rng.integers(0, seen + rows + 1)
+            hit = slots < n
+            rows, slots = rows[hit], slots[hit]
+            if len(rows):
+                # Si varias filas caen en la misma posición gana la última
+                last = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+                rows, slots = rows[last], slots[last]
+                keep = np.ones(len(reservoir), dtype=bool)
+                keep[slots] = False
+                reservoir = pd.concat([reservoir.iloc[keep], chunk.iloc[rows]])
+        seen += m
+
+    if reservoir is None:
+        return pd.DataFrame()
+    return reservoir.sort_index().reset_index(drop=True)
@@ -1,5 +1,6 @@
 import pandas as pd
 from tabulate import tabulate
+from etl.streaming import chunk_support
 
 class TransformOperations:
     """
@@ -35,6 +36,7 @@ class TransformOperations:
             raise
 
     @staticmethod
+    @chunk_support
     def left_join(df1, df2, on, show = 0):
         """
         Realiza una unión LEFT JOIN entre dos DataFrames según las columnas indicadas.
@@ -118,6 +120,7 @@ class TransformOperations:
             raise
 
     @staticmethod
+    @chunk_support
     def inner_join(df1, df2, on, show=0):
         """
         Realiza una unión INNER JOIN entre dos DataFrames según las columnas indicadas.
@@ -224,6 +227,7 @@ class TransformOperations:
             raise
 
     @staticmethod
+    @chunk_support
     def apply_to_column(df, column, func, show=0):
         """
         Aplica una función a una columna específica del DataFrame.
@@ -341,6 +345,7 @@ class TransformOperations:
             raise
 
     @staticmethod
+    @chunk_support
     def replace_values(df, column, old_value, new_value, show=0):
         """
         Reemplaza valores en una columna específica del DataFrame.
@@ -2,6 +2,7 @@
 import pandas as pd
 from tabulate import tabulate
 from functools import wraps
+from etl.streaming import chunk_support
 
 
 def validate_params(df_type=False, columns_type=False, lambda_type=False, n_type=False):
@@ -79,6 +80,7 @@ class BasicsTransformOperations:
   
 
     @staticmethod
+    @chunk_support
     @validate_params(df_type=True, columns_type=True, lambda_type=True, n_type=True)
     def add_new_column(df, new_column_name, lambda_func, show=0):
         #Agrega una nueva columna al DataFrame usando una función lambda.
@@ -100,6 +102,7 @@ class BasicsTransformOperations:
    
 
     @staticmethod
+    @chunk_support
     @validate_params(df_type=True, columns_type=True, n_type=True)
     def remove_columns(df, columns_to_drop, show=0, extra_param=None):
         #Elimina columnas del DataFrame.
@@ -116,6 +119,7 @@ class BasicsTransformOperations:
 
 
     @staticmethod
+    @chunk_support
     @validate_params(df_type=True, columns_type=True, n_type=True)
     def select_columns(df, *columns, show=0):
         #Selecciona columnas específicas del DataFrame.
@@ -131,6 +135,7 @@ class BasicsTransformOperations:
             raise
 
     @staticmethod
+    @chunk_support
     @validate_params(df_type=True, columns_type=True, lambda_type=True, n_type=True)
     def transform_column(df, column, func, show=0):
         #Aplica una función LAMBDA a una columna específica del DataFrame.
@@ -146,6 +151,7 @@ class BasicsTransformOperations:
             raise
 
     @staticmethod
+    @chunk_support
     @validate_params(df_type=True, lambda_type=True, n_type=True)
     def filter_by_condition(df, lambda_func, show=0):
         #Filtra filas de un DataFrame según una función lambda.
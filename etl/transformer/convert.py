@@ -1,5 +1,7 @@
 import pandas as pd
 from tabulate import tabulate
+from etl.streaming import chunk_support
+from etl.config import as_text, backend_dtype, get_dtype_backend
 
 import pandas as pd
 from tabulate import tabulate
@@ -20,6 +22,7 @@ class ConvertOperations:
             raise
     
     @staticmethod
+    @chunk_support
     def convert_column_type(df, columns, dtype, show=0):
         """
         Convierte el tipo de una o varias columnas.
@@ -60,9 +63,9 @@ class ConvertOperations:
                 elif target_type == 'category':
                     df[col] = df[col].astype('category')
                 elif target_type == 'str':
-                    df[col] = df[col].astype(str)
+                    df[col] = df[col].astype(backend_dtype('str'))
                 elif target_type in ['int', 'float']:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').astype(target_type)
+                    df[col] = pd.to_numeric(df[col], errors='coerce').astype(backend_dtype(target_type))
                 else:
                     df[col] = df[col].astype(target_type)
             
@@ -79,6 +82,7 @@ class ConvertOperations:
             raise
     
     @staticmethod
+    @chunk_support
     def clean_numeric_columns(df, columns, show=0):
         """
         Limpia columnas numéricas eliminando símbolos no numéricos ($, %, comas, etc.)
@@ -104,11 +108,16 @@ class ConvertOperations:
                 if col not in df.columns:
                     raise ValueError(f"La columna '{col}' no existe en el DataFrame")
                 
-                # Elimina caracteres no numéricos excepto punto y signo negativo
+                # Elimina caracteres no numéricos excepto punto y signo negativo. to_numeric con
+                # dtype_backend falla con textos Arrow que tienen nulos y valores no numéricos:
+                # se convierte sin él y se pasa por float64 para que los NaN de los valores no
+                # convertibles queden como nulos en el real del backend
                 df[col] = pd.to_numeric(
-                    df[col].astype(str).str.replace(r'[^\d.-]', '', regex=True),
+                    as_text(df[col]).str.replace(r'[^\d.-]', '', regex=True),
                     errors='coerce'
                 )
+                if get_dtype_backend() is not None:
+                    df[col] = df[col].astype("float64").astype(backend_dtype("float"))
             
             # Mostrar resultados si show está habilitado
             if show > 0:
@@ -123,6 +132,7 @@ class ConvertOperations:
             raise
     
     @staticmethod
+    @chunk_support
     def convert_to_ordered_category(df, column, categories, ordered=True, show=0):
         """
         Convierte una columna a categoría ordenada.
@@ -169,6 +179,7 @@ class ConvertOperations:
             raise
     
     @staticmethod
+    @chunk_support
     def extract_date_components(df, date_column, components=None, show=0):
         """
         Extrae componentes de fecha (año, mes, día) de una columna datetime.
@@ -196,8 +207,9 @@ class ConvertOperations:
             if date_column not in df.columns:
                 raise ValueError(f"La columna '{date_column}' no existe en el DataFrame")
             
-            # Primero aseguramos que sea datetime
-            df[date_column] = pd.to_datetime(df[date_column], errors='coerce')
+            # Primero aseguramos que sea datetime (las fechas, también las de Arrow, se dejan igual)
+            if not pd.api.types.is_datetime64_any_dtype(df[date_column]):
+                df[date_column] = pd.to_datetime(df[date_column], errors='coerce')
             
             for component in components:
                 if component == 'year':
@@ -214,6 +226,10 @@ class ConvertOperations:
                     df[f'{date_column}_minute'] = df[date_column].dt.minute
                 else:
                     raise ValueError(f"Componente '{component}' no reconocido")
+                if get_dtype_backend() is not None:
+                    # Con NaT los componentes llegan como float64; con un backend, enteros con nulos
+                    name = f'{date_column}_{component}'
+                    df[name] = df[name].astype(backend_dtype("int"))
             
             # Mostrar resultados si show está habilitado
             if show > 0:
@@ -228,6 +244,7 @@ class ConvertOperations:
             raise
     
     @staticmethod
+    @chunk_support
     def boolean_to_binary(df, columns, show=0):
         """
         Convierte columnas booleanas a binarias (0 y 1).
@@ -268,6 +285,7 @@ class ConvertOperations:
             raise
     
     @staticmethod
+    @chunk_support
     def split_string_column(df, column, delimiter, new_columns=None, show=0):
         """
         Divide una columna de strings en múltiples columnas.
@@ -1,5 +1,7 @@
 import pandas as pd
 from tabulate import tabulate
+from etl.config import as_text
+from etl.streaming import chunk_support
 from etl.transformer.basics_data_transformer import BasicsTransformOperations
 
 
@@ -20,6 +22,7 @@ class DataExpresion:
             raise
 
     @staticmethod
+    @chunk_support
     def search_in_column(df, field, pattern, show=0, complement=False):
         #Busca filas donde el campo contenga el patrón dado.
         try:
@@ -33,9 +36,9 @@ class DataExpresion:
                 raise ValueError("show debe ser un entero mayor o igual a -1")
             
             if complement:
-                result = df[~df[field].astype(str).str.contains(pattern, na=False)]
+                result = df[~as_text(df[field]).str.contains(pattern, na=False)]
             else:
-                result = df[df[field].astype(str).str.contains(pattern, na=False)]
+                result = df[as_text(df[field]).str.contains(pattern, na=False)]
             
             if show:
                 print(btf.show_head(result, show if show > 0 else len(result)))
@@ -46,6 +49,7 @@ class DataExpresion:
             raise
 
     @staticmethod
+    @chunk_support
     def search_in_table(df, pattern, show=0,  complement=False):
         #Busca filas donde cualquier campo contenga el patrón dado.
         try:
@@ -56,7 +60,7 @@ class DataExpresion:
             if not isinstance(show, int) or show < -1:
                 raise ValueError("show debe ser un entero mayor o igual a -1")
             
-            mask = df.astype(str).apply(lambda row: row.str.contains(pattern, na=False)).any(axis=1)
+            mask = df.apply(lambda col: as_text(col).str.contains(pattern, na=False)).any(axis=1)
             result = df[~mask] if complement else df[mask]
             
             if show:
@@ -68,6 +72,7 @@ class DataExpresion:
             raise
 
     @staticmethod
+    @chunk_support
     def split_column_into_rows(df, field, delimiter, show=0):
         #Divide un campo en varias filas mediante un delimitador.
         try:
@@ -80,7 +85,7 @@ class DataExpresion:
             if not isinstance(show, int) or show < -1:
                 raise ValueError("show debe ser un entero mayor o igual a -1")
             
-            df_exploded = df.assign(**{field: df[field].astype(str).str.split(delimiter)}).explode(field)
+            df_exploded = df.assign(**{field: as_text(df[field]).str.split(delimiter)}).explode(field)
             result = df_exploded.reset_index(drop=True)
             
             if show:
@@ -1,5 +1,4 @@
 import pandas as pd
-import holidays
 from tabulate import tabulate  # 📌 Para mostrar tablas bonitas en la consola
 
 class DateTime:
@@ -7,6 +6,8 @@ class DateTime:
         self.start_date = f"{start_year}-01-01"
         self.end_date = f"{end_year}-12-31"
 
+        import holidays  # solo se necesita al construir la dimensión (importarlo es costoso)
+
         self.holidays_colombia = holidays.CO(years=range(start_year, end_year + 1), language="es")
         self.df = self._generate_date_dimension()
 
@@ -1,5 +1,6 @@
 import pandas as pd
 from tabulate import tabulate
+from etl.streaming import chunk_support
 
 class HeaderOperations:
     
@@ -19,6 +20,7 @@ class HeaderOperations:
             raise
     
     @staticmethod
+    @chunk_support
     def replace_all_headers(df, new_headers, show=0): 
         #Reemplaza completamente la fila de encabezado con una nueva lista de nombres de columnas.
         try:
@@ -43,6 +45,7 @@ class HeaderOperations:
             raise
 
     @staticmethod
+    @chunk_support
     def rename_columns(df, *args, show=0, **kwargs): 
         # Renombra uno o más valores en la fila de encabezado del DataFrame y muestra opcionalmente el resultado.
 
@@ -70,6 +73,7 @@ class HeaderOperations:
         
 
     @staticmethod
+    @chunk_support
     def drop_header(df, columns_to_drop, show=0): # ELIMINAR ESA EN BASICS TRANSFORMS
         #Elimina una o más columnas del DataFrame.
         
@@ -97,6 +101,7 @@ class HeaderOperations:
             raise
 
     @staticmethod
+    @chunk_support
     def prefix_header(df, prefix, show=0): #ante pone un prefijo
         try:
             df = df.add_prefix(prefix)
@@ -110,6 +115,7 @@ class HeaderOperations:
             raise
 
     @staticmethod
+    @chunk_support
     def suffix_header(df, suffix, show=0):#dobrepone pone un prefijo
         try:
             df = df.add_suffix(suffix)
@@ -1,8 +1,25 @@
+from functools import wraps
 import pandas as pd
 from tabulate import tabulate
+from etl.config import as_text
+from etl.streaming import chunk_support
 from etl.transformer.basics_data_transformer import BasicsTransformOperations
 
 
+def pushdown_support(func):
+    """
+    Si el primer argumento es una tabla diferida (LazyTable de DB_Extractor), la operación no
+    se ejecuta en pandas: se delega en el método del mismo nombre, que la agrega al SELECT.
+    """
+    @wraps(func)
+    def wrapper(df, *args, **kwargs):
+        if getattr(df, "supports_pushdown", False):
+            return getattr(df, func.__name__)(*args, **kwargs)
+        return func(df, *args, **kwargs)
+
+    return wrapper
+
+
 class DataSelect:
     # Asignamos la clase BasicsTransformOperations para usar sus operaciones si se requiere
     hd = BasicsTransformOperations
@@ -42,6 +59,7 @@ class DataSelect:
             raise ValueError(f"El campo '{field}' no existe en el DataFrame.")
 
     @staticmethod
+    @chunk_support
     def filter_by_operation(df, field, value, op, complement=False, show=0):
         """
         Filtra filas aplicando una operación lógica personalizada.
@@ -76,6 +94,8 @@ class DataSelect:
             raise
 
     @staticmethod
+    @pushdown_support
+    @chunk_support
     def filter_equal(df, field, value, complement=False, show=0):
         """
         Filtra filas donde el valor en 'field' es igual a 'value'.
@@ -98,6 +118,8 @@ class DataSelect:
             raise
 
     @staticmethod
+    @pushdown_support
+    @chunk_support
     def filter_not_equal(df, field, value, complement=False, show=0):
         """
         Filtra filas donde el valor en 'field' NO es igual a 'value'.
@@ -107,6 +129,8 @@ class DataSelect:
         return DataSelect.filter_equal(df, field, value, not complement, show)
 
     @staticmethod
+    @pushdown_support
+    @chunk_support
     def filter_in_range(df, field, minv, maxv, complement=False, show=0):
         """
         Filtra filas donde el valor del campo está dentro del rango [minv, maxv].
@@ -133,6 +157,7 @@ class DataSelect:
             raise
 
     @staticmethod
+    @chunk_support
     def filter_contains(df, field, value, complement=False, show=0):
         """
         Filtra filas donde el valor de 'field' contiene la cadena 'value'.
@@ -144,8 +169,8 @@ class DataSelect:
             if not isinstance(value, str):
                 raise TypeError("value debe ser un string")
 
-            # Convertimos todo a string para evitar errores y aplicamos contains
-            mask = df[field].astype(str).str.contains(value, na=False)
+            # Convertimos a texto (si no lo es ya) para evitar errores y aplicamos contains
+            mask = as_text(df[field]).str.contains(value, na=False)
             result = df[~mask] if complement else df[mask]
 
             if show:
@@ -157,6 +182,8 @@ class DataSelect:
             raise
 
     @staticmethod
+    @pushdown_support
+    @chunk_support
     def filter_in_list(df, field, values, complement=False, show=0):
         """
         Filtra filas donde el valor en 'field' está dentro de una lista (o set, tupla) de valores.
@@ -181,6 +208,8 @@ class DataSelect:
             raise
 
     @staticmethod
+    @pushdown_support
+    @chunk_support
     def filter_is_null(df, field, complement=False, show=0):
         """
         Filtra filas donde el valor del campo es NaN o None.
@@ -201,6 +230,8 @@ class DataSelect:
             raise
 
     @staticmethod
+    @pushdown_support
+    @chunk_support
     def select_not_none(df, field, complement=False, show=0):
         """
         Filtra filas donde el valor del campo NO es NaN o None.
@@ -248,6 +279,8 @@ class DataSelect:
             raise
 
     @staticmethod
+    @pushdown_support
+    @chunk_support
     def select_columns(df, *columns, complement=False, show=0):
         """
         Selecciona columnas específicas del DataFrame o excluye si complement es True.
@@ -16,20 +16,15 @@ def create_db_connection():
     return DB_Extractor(**db_params)
 
 def extract_tables(db_connected, table_names):
-    """Extrae múltiples tablas usando un bucle"""
-    tables_data = {}
+    """Extrae múltiples tablas en paralelo con el pool de conexiones del extractor"""
+    tables_data = db_connected.extract_many(table_names)
     
-    for table_name in table_names:
-        print(f"Extrayendo datos de la tabla {table_name.upper()}...")
-        try:
-            data = db_connected.get_table(table_name)
-            tables_data[table_name] = data
-            print(f"✅ {table_name.upper()} extraída exitosamente")
-            BasicsTransformOperations.show_head(data, 3)
-            
-        except Exception as e:
-            print(f"❌ Error extrayendo {table_name}: {e}")
-            tables_data[table_name] = None
+    for table_name, data in tables_data.items():
+        if data is None:
+            continue
+        stats = db_connected.last_extraction[table_name]
+        print(f"✅ {table_name.upper()} extraída exitosamente ({stats['rows']} filas, {stats['seconds']} s)")
+        BasicsTransformOperations.show_head(data, 3)
             
     return tables_data
 